@@ -32,6 +32,9 @@ sleep 2
 # Create logs directory
 mkdir -p "$LOG_DIR"
 
+# Part of page ETags, so clients revalidate against the new code
+export SITE_VERSION="$(git -C "$APP_DIR" rev-parse --short HEAD 2>/dev/null)"
+
 # Start Gunicorn with daemon flag
 echo "Starting Gunicorn..."
 /opt/miniforge/envs/goodall/bin/gunicorn mysite.wsgi:application \
@@ -0,0 +1,128 @@
+"""Redirects from Method and SOP URLs to their section of the parent metric page.
+
+Methods and SOPs are shown inline on their metric page, so their own URLs
+redirect to ``<metric url>#method-<slug>`` / ``#sop-<slug>``. Rather than route
+each such request through Wagtail (page lookup, parent lookup, specific page
+fetch), the target of every live Method/SOP is kept in ``SectionRedirect``
+under its site and URL path, and ``AnchorRedirectMiddleware`` answers from
+there (one indexed query, after Wagtail's own site lookup) before Wagtail
+routes the request. Only URLs resolving to Wagtail's serve view are looked up.
+
+The table is maintained from the page signals: publishing or moving a page
+(re)computes the rows of the Methods and SOPs at or below it, whose URLs or
+parent URL may have changed, and unpublishing one drops them; deleting a page
+deletes its row. Should a row be missing (pages published before the table
+existed), the request falls through to the page's ``serve``, which redirects
+the same way and stores the row.
+"""
+from __future__ import annotations
+
+from django.db import transaction
+from django.dispatch import receiver
+from django.http import HttpResponseRedirect
+
+from wagtail.models import Page, Site
+from wagtail.signals import page_published, page_unpublished, post_page_move, pre_page_move
+
+
+def anchor_url(page, parent_url):
+    """The URL of ``page``'s section on its parent's page."""
+    from .models import MethodPage
+
+    prefix = "method" if isinstance(page, MethodPage) else "sop"
+    return f"{parent_url}#{prefix}-{page.slug}"
+
+
+def lookup(site, path):
+    """The redirect target of ``path`` on ``site``, or ``None``."""
+    from .models import SectionRedirect
+
+    return SectionRedirect.objects.filter(site=site, path=path).values_list("target", flat=True).first()
+
+
+def section_redirect(page, request):
+    """
+    The redirect for a Method/SOP served by Wagtail (its row was missing),
+    stored for the next request. ``None`` for a page without a parent.
+    """
+    from .models import SectionRedirect
+
+    parent = page.get_parent()
+    if parent is None:
+        return None
+    target = anchor_url(page, parent.url)
+    site = Site.find_for_request(request)
+    if site is not None and not getattr(request, "is_preview", False):
+        SectionRedirect.objects.update_or_create(
+            page=page, defaults={"site": site, "path": request.path, "target": target},
+        )
+    return HttpResponseRedirect(target)
+
+
+def _sections_in(page):
+    """The Method and SOP pages at or below ``page``."""
+    from .models import MethodPage, SOPPage
+
+    return Page.objects.filter(path__startswith=page.path).type(MethodPage, SOPPage)
+
+
+def forget_sections(page):
+    """Drop the rows of every Method and SOP at or below ``page``."""
+    from .models import SectionRedirect
+
+    SectionRedirect.objects.filter(page__path__startswith=page.path).delete()
+
+
+def refresh_sections(page):
+    """(Re)compute the rows of every Method and SOP at or below ``page``."""
+    from .models import SectionRedirect
+
+    sections = list(_sections_in(page).specific(defer=True))
+    if not sections:
+        return
+    parent_paths = {section.path[:-Page.steplen] for section in sections}
+    parents = {parent.path: parent for parent in Page.objects.filter(path__in=parent_paths)}
+    rows = []
+    for section in sections:
+        parent = parents.get(section.path[:-Page.steplen])
+        url_parts = section.get_url_parts() if section.live else None
+        parent_url = parent.get_url() if parent and parent.live else None
+        if url_parts and parent_url:
+            site_id, _root_url, path = url_parts
+            rows.append(SectionRedirect(
+                page=section, site_id=site_id, path=path, target=anchor_url(section, parent_url),
+            ))
+    with transaction.atomic():
+        SectionRedirect.objects.filter(page__in=[section.pk for section in sections]).delete()
+        SectionRedirect.objects.bulk_create(rows)
+
+
+class AnchorRedirectMiddleware:
+    """Answer Method/SOP URLs from ``SectionRedirect``, before Wagtail routing."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # Only URLs Wagtail would route (not the search page, the admin, ...).
+        if request.method not in ("GET", "HEAD") or request.resolver_match.url_name != "wagtail_serve":
+            return None
+        # Cached on the request, so Wagtail's routing reuses it.
+        site = Site.find_for_request(request)
+        target = lookup(site, request.path) if site else None
+        return HttpResponseRedirect(target) if target else None
+
+
+@receiver(page_published)
+@receiver(post_page_move)
+def refresh_on_publish(sender, instance, **kwargs):
+    refresh_sections(instance)
+
+
+@receiver(page_unpublished)
+@receiver(pre_page_move)
+def forget_on_unpublish(sender, instance, **kwargs):
+    forget_sections(instance)
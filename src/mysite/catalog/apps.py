@@ -5,3 +5,7 @@ class CatalogConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "catalog"
     verbose_name = "Wiki Catalog"
+
+    def ready(self):
+        # Connects the receivers maintaining the Method/SOP redirect map.
+        from . import anchor_redirects  # noqa: F401
@@ -0,0 +1,61 @@
+"""Shared-cache version counters for data derived from the catalog.
+
+Anything computed from published catalog pages (search results, filter
+options, ...) is cached under a key that embeds a version number. Publishing
+or unpublishing a catalog page bumps the version, which makes every older
+entry unreachable at once — no need to track which keys a change affects, and
+the stale entries simply expire.
+
+The counters live in the default cache so every gunicorn worker sees the same
+version. If a counter is evicted it restarts from the current time in
+milliseconds, which is always ahead of any version handed out before.
+"""
+from __future__ import annotations
+
+import time
+
+from django.core.cache import cache
+
+CATALOG = "catalog"
+# Bumped only for IndicatorPage changes (search filter options).
+INDICATORS = "indicators"
+# Bumped when stored rich-text HTML is re-rendered without a publish (the
+# render_rich_text command): fragments cached per page revision go stale.
+FRAGMENTS = "fragments"
+
+
+def _key(name: str) -> str:
+    return f"version:{name}"
+
+
+def get_version(name: str = CATALOG, timeout: int | None = None) -> int:
+    """
+    Return the current version of ``name``, initialising it if missing (to
+    expire after ``timeout`` seconds, if given).
+    """
+    version = cache.get(_key(name))
+    if version is None:
+        cache.add(_key(name), int(time.time() * 1000), timeout)
+        version = cache.get(_key(name))
+    return version
+
+
+def peek_version(name: str) -> int | None:
+    """The current version of ``name``, or ``None`` if it has none (yet)."""
+    return cache.get(_key(name))
+
+
+def bump_version(name: str = CATALOG, create: bool = True) -> int | None:
+    """
+    Invalidate everything cached under the current version of ``name``. With
+    ``create=False`` a missing counter is left missing: nothing can be cached
+    under it.
+    """
+    try:
+        return cache.incr(_key(name))
+    except ValueError:
+        if not create:
+            return None
+        # Missing (never read, or evicted): starting afresh is a bump too.
+        get_version(name)
+        return cache.incr(_key(name))
@@ -0,0 +1,78 @@
+"""Conditional GET (``ETag`` / ``304``) for Wagtail pages.
+
+A page's ETag is derived from the published state of every page it renders
+(its ``validator_scope``): the latest ``last_published_at`` among them, and how
+many of them are live, so unpublishing or deleting one changes the ETag too.
+Both come from one aggregate query, made before rendering, so a client
+revalidating with ``If-None-Match`` gets a ``304`` without the template (or the
+page's ``get_context`` queries) running at all.
+
+The ETag also covers what changes the HTML without a publish: the deployed
+code and templates (the ``SITE_VERSION`` setting) and the fragments version
+(bumped when stored rich text is re-rendered, see ``cache_utils``).
+
+No ``Last-Modified`` is sent: unpublishing or deleting a page makes its
+parent's content older, not newer, which a date can't express.
+
+Only anonymous views get an ETag: editors see their user menu and the Wagtail
+userbar, and previews aren't the published page.
+"""
+from __future__ import annotations
+
+import hashlib
+
+from django.conf import settings
+from django.db.models import Count, Max, Q
+from django.utils.cache import get_conditional_response
+
+from wagtail.models import Page
+
+from .cache_utils import FRAGMENTS, get_version
+
+
+def subtree_scope(page):
+    """The page, everything below it, and its parent (breadcrumbs)."""
+    return Q(path__startswith=page.path) | Q(path=page.path[:-Page.steplen], depth=page.depth - 1)
+
+
+def page_etag(page):
+    """The ETag of ``page``, or ``None`` if it was never published."""
+    stats = Page.objects.filter(page.validator_scope()).aggregate(
+        published=Max("last_published_at"),
+        live=Count("pk", filter=Q(live=True)),
+    )
+    if stats["published"] is None:
+        return None
+    source = ":".join(str(part) for part in (
+        settings.SITE_VERSION, page.pk, stats["published"].isoformat(), stats["live"],
+        get_version(FRAGMENTS),
+    ))
+    return '"%s"' % hashlib.md5(source.encode(), usedforsecurity=False).hexdigest()
+
+
+class ConditionalServeMixin:
+    """
+    Answer conditional GETs for a page before rendering it. Pages define
+    ``validator_scope()``: a ``Q`` over ``Page`` matching the pages they render.
+    """
+
+    def validator_scope(self):
+        return subtree_scope(self)
+
+    def serve(self, request, *args, **kwargs):
+        etag = None
+        user = getattr(request, "user", None)
+        if (
+            request.method in ("GET", "HEAD")
+            and not (user and user.is_authenticated)
+            and not getattr(request, "is_preview", False)
+        ):
+            etag = page_etag(self)
+        if etag is None:
+            return super().serve(request, *args, **kwargs)
+
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = super().serve(request, *args, **kwargs)
+        response.setdefault("ETag", etag)
+        return response
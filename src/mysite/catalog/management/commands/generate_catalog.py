@@ -0,0 +1,159 @@
+"""Generate a synthetic Indicator → Metric → Method/SOP tree for benchmarking.
+
+    python manage.py generate_catalog --indicators 2000 --metrics 3 --methods 4
+    python manage.py generate_catalog --clear
+
+Pages are created live under the default site's home page (or ``--parent``),
+with rich-text bodies assembled from an adaptation-tracking vocabulary and
+facet values in inconsistent casing, like the real catalog. Every generated
+indicator's slug starts with ``synthetic-``; ``--clear`` deletes them (and
+everything beneath them). The same ``--seed`` always produces the same tree.
+"""
+import random
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from wagtail.models import Page, Site
+
+from catalog.cache_utils import INDICATORS, bump_version
+from catalog.models import IndicatorPage, MethodPage, MetricPage, SOPPage
+
+SLUG_PREFIX = "synthetic-"
+
+DIMENSIONS = ["Resilience", "resilience ", "Adaptive capacity", "Vulnerability", "Exposure", "Ecosystems"]
+INDICATOR_TYPES = ["Outcome", "output", "Output", "Process", "Impact"]
+
+WORDS = (
+    "drought flood rainfall temperature heat crop yield maize sorghum livestock pasture "
+    "water access irrigation groundwater soil erosion salinity forest mangrove wetland "
+    "household income insurance credit market extension training gender youth nutrition "
+    "food security early warning forecast climate risk hazard exposure vulnerability "
+    "adaptation resilience capacity planning finance budget policy governance community "
+    "survey census satellite remote sensing index baseline target monitoring evaluation "
+    "district province national regional season harvest loss damage recovery migration"
+).split()
+SUBJECTS = [
+    "Households", "Farmers", "Smallholders", "Communities", "Districts", "Women-led enterprises",
+    "Pastoralists", "Local governments", "Cooperatives", "Schools",
+]
+
+
+class Command(BaseCommand):
+    help = "Create a synthetic catalog of live Indicator, Metric, Method and SOP pages."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--indicators", type=int, default=50, help="Indicators to create.")
+        parser.add_argument("--metrics", type=int, default=3, help="Metrics per indicator (at most 3).")
+        parser.add_argument("--methods", type=int, default=2, help="Methods per metric (at most 4).")
+        parser.add_argument("--no-sops", action="store_true", help="Don't give metrics an SOP.")
+        parser.add_argument("--parent", help="Slug of the page to create indicators under.")
+        parser.add_argument("--seed", type=int, default=0, help="Random seed.")
+        parser.add_argument("--clear", action="store_true", help="Delete previously generated pages and exit.")
+
+    def handle(self, *args, **options):
+        parent = self.get_parent(options["parent"])
+        if options["clear"]:
+            self.clear(parent)
+            return
+
+        self.random = random.Random(options["seed"])
+        # Same limits as the clean() of MetricPage, MethodPage and SOPPage.
+        metrics = min(max(options["metrics"], 0), 3)
+        methods = min(max(options["methods"], 0), 4)
+        sops = 0 if options["no_sops"] else 1
+        counts = {"indicators": 0, "metrics": 0, "methods": 0, "sops": 0}
+        start = parent.get_children().filter(slug__startswith=SLUG_PREFIX).count()
+
+        with transaction.atomic():
+            for i in range(start, start + options["indicators"]):
+                indicator = self.add(parent, IndicatorPage(
+                    title=self.title(), slug=f"{SLUG_PREFIX}{i}",
+                    description=self.richtext(),
+                    dimension=self.random.choice(DIMENSIONS),
+                    indicator_type=self.random.choice(INDICATOR_TYPES),
+                ))
+                counts["indicators"] += 1
+                for j in range(metrics):
+                    metric = self.add(indicator, MetricPage(
+                        title=f"{self.random.choice(SUBJECTS)} {self.phrase(3)}", slug=f"metric-{j}",
+                        description=self.richtext(), purpose=self.richtext(paragraphs=1),
+                        adaptation_tracking_function=self.richtext(paragraphs=1),
+                    ))
+                    counts["metrics"] += 1
+                    for k in range(methods):
+                        self.add(metric, MethodPage(
+                            title=f"{self.phrase(2).capitalize()} method", slug=f"method-{k}",
+                            description=self.richtext(), resolution=self.random.choice(["Household", "District", "National"]),
+                            advantages=self.richtext(items=3), limitations=self.richtext(items=3),
+                            use_case=self.richtext(paragraphs=1),
+                        ))
+                        counts["methods"] += 1
+                    for k in range(sops):
+                        self.add(metric, SOPPage(
+                            title=f"SOP: {self.phrase(3)}", slug=f"sop-{k}",
+                            definition=self.richtext(), data_sources=self.richtext(items=3),
+                            units="%", frequency=self.random.choice(["Annual", "Seasonal", "Monthly"]),
+                            activities_and_steps=self.richtext(items=6),
+                            references=self.richtext(items=2),
+                        ))
+                        counts["sops"] += 1
+
+        # Pages were created directly (no publish signal): invalidate derived caches.
+        bump_version()
+        bump_version(INDICATORS)
+        self.stdout.write(self.style.SUCCESS(
+            "Created {indicators} indicators, {metrics} metrics, {methods} methods, {sops} SOPs "
+            "under '{parent}'.".format(parent=parent.title, **counts)
+        ))
+
+    def get_parent(self, slug):
+        if slug:
+            parent = Page.objects.filter(slug=slug).first()
+        else:
+            site = Site.objects.filter(is_default_site=True).first() or Site.objects.first()
+            parent = site.root_page if site else None
+        if parent is None:
+            raise CommandError("No parent page found; pass --parent <slug>.")
+        parent = parent.specific
+        if type(parent) not in IndicatorPage.allowed_parent_page_models():
+            raise CommandError(f"'{parent.title}' cannot hold indicators.")
+        return parent
+
+    def clear(self, parent):
+        generated = parent.get_children().filter(slug__startswith=SLUG_PREFIX)
+        count = generated.count()
+        for page in generated:
+            page.delete()
+        bump_version()
+        bump_version(INDICATORS)
+        self.stdout.write(self.style.SUCCESS(f"Deleted {count} generated indicators."))
+
+    def add(self, parent, page):
+        now = timezone.now()
+        page.live = True
+        page.first_published_at = page.last_published_at = now
+        return parent.add_child(instance=page)
+
+    def phrase(self, n):
+        return " ".join(self.random.sample(WORDS, n))
+
+    def title(self):
+        return f"{self.phrase(2).capitalize()} {self.random.choice(['index', 'rate', 'share', 'coverage', 'score'])}"
+
+    def sentence(self):
+        words = [self.random.choice(WORDS) for _ in range(self.random.randint(8, 20))]
+        if self.random.random() < 0.3:
+            pos = self.random.randrange(len(words))
+            words[pos] = f"<b>{words[pos]}</b>"
+        return " ".join(words).capitalize() + "."
+
+    def richtext(self, paragraphs=2, items=0):
+        html = "".join(
+            "<p>" + " ".join(self.sentence() for _ in range(self.random.randint(2, 4))) + "</p>"
+            for _ in range(paragraphs)
+        )
+        if items:
+            html += "<ul>" + "".join(f"<li>{self.sentence()}</li>" for _ in range(items)) + "</ul>"
+        return html
@@ -0,0 +1,68 @@
+"""Store the rendered rich-text HTML (and search text) of existing catalog pages.
+
+    python manage.py render_rich_text
+    python manage.py render_rich_text --stale
+
+Catalog pages render their rich-text fields when a revision is published (see
+``BaseWikiPage.rendered_html``). Run this once after deploying that change, and
+again after changing how rich text renders (e.g. ``richtext_utils``). Pages
+linking to a page that is published, unpublished or moved are re-rendered
+automatically (``catalog.models.refresh_linking_html``).
+Rows are updated in place: no revisions, publish signals or audit entries; the
+page cache entries of the re-rendered pages and their parents are purged.
+"""
+from django.core.management.base import BaseCommand
+
+from wagtail.models import Page
+
+from catalog.cache_utils import FRAGMENTS, bump_version
+from catalog.models import IndicatorPage, MethodPage, MetricPage, SOPPage, render_rich_text_many
+from home.page_cache import _page_paths, purge_paths
+
+CATALOG_MODELS = (IndicatorPage, MetricPage, MethodPage, SOPPage)
+# Pages whose rich text is expanded together.
+BATCH_SIZE = 100
+
+
+class Command(BaseCommand):
+    help = "Render and store the rich-text HTML of every catalog page."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--stale", action="store_true",
+            help="Only pages whose stored HTML is missing or older than their content.",
+        )
+
+    def handle(self, *args, **options):
+        total = 0
+        for model in CATALOG_MODELS:
+            count = 0
+            batch = []
+            for page in model.objects.iterator(chunk_size=BATCH_SIZE):
+                if options["stale"] and page.has_current_html():
+                    continue
+                batch.append(page)
+                if len(batch) == BATCH_SIZE:
+                    count += self.render(model, batch)
+                    batch = []
+            count += self.render(model, batch)
+            self.stdout.write(f"{model._meta.verbose_name_plural}: {count}")
+            total += count
+        # The stored HTML changed without new revisions: drop cached fragments.
+        bump_version(FRAGMENTS)
+        self.stdout.write(self.style.SUCCESS(f"Rendered {total} pages."))
+
+    def render(self, model, pages):
+        if not pages:
+            return 0
+        # Links and embeds are resolved for the whole batch at once.
+        for page, rendered in zip(pages, render_rich_text_many(pages)):
+            model.objects.filter(pk=page.pk).update(
+                rendered_html=rendered,
+                search_text=page.extract_search_text(),
+            )
+        # Cached responses of these pages, and of their parents (which show
+        # SOPs and Methods inline), hold the old HTML.
+        parent_paths = {page.path[:-Page.steplen] for page in pages}
+        purge_paths(_page_paths([*pages, *Page.objects.filter(path__in=parent_paths)]))
+        return len(pages)
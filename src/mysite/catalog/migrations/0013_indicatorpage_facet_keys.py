@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:30
+
+from django.db import migrations, models
+
+
+def backfill_facet_keys(apps, schema_editor):
+    """Populate the normalized facet keys for indicators saved before they existed."""
+    IndicatorPage = apps.get_model('catalog', 'IndicatorPage')
+    for page in IndicatorPage.objects.only('pk', 'dimension', 'indicator_type').iterator():
+        IndicatorPage.objects.filter(pk=page.pk).update(
+            dimension_key=(page.dimension or '').strip().lower(),
+            indicator_type_key=(page.indicator_type or '').strip().lower(),
+        )
+
+
+def noop(apps, schema_editor):
+    pass
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0012_remove_methodpage_cost_level_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='indicatorpage',
+            name='dimension_key',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=150),
+        ),
+        migrations.AddField(
+            model_name='indicatorpage',
+            name='indicator_type_key',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=150),
+        ),
+        migrations.RunPython(backfill_facet_keys, noop),
+    ]
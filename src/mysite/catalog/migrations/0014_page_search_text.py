@@ -0,0 +1,74 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:40
+
+import html
+import re
+
+from django.db import migrations, models
+
+_TAG_RE = re.compile(r'<[^>]*>')
+
+
+def plain_text(value):
+    """Frozen copy of catalog.richtext_utils.plain_text as of this migration."""
+    if not value:
+        return ''
+    text = html.unescape(_TAG_RE.sub(' ', str(value)))
+    return ' '.join(text.split())
+
+# Body fields of each model's search_fields at the time of this migration.
+SEARCH_TEXT_FIELDS = {
+    'IndicatorPage': ['description'],
+    'MetricPage': ['description', 'purpose', 'adaptation_tracking_function'],
+    'MethodPage': ['description', 'use_case', 'resources', 'advantages', 'limitations'],
+    'SOPPage': [
+        'definition', 'data_sources', 'available_tools_and_code', 'activities_and_steps',
+        'technical_capacity', 'options_enhancing_robustness', 'options_reducing_costs',
+        'references', 'flagship_method_status',
+    ],
+}
+
+
+def backfill_search_text(apps, schema_editor):
+    """Extract the plain-text body of pages saved before the column existed."""
+    for model_name, fields in SEARCH_TEXT_FIELDS.items():
+        model = apps.get_model('catalog', model_name)
+        for page in model.objects.only('pk', *fields).iterator():
+            texts = (plain_text(getattr(page, name)) for name in fields)
+            model.objects.filter(pk=page.pk).update(
+                search_text='\n'.join(text for text in texts if text)
+            )
+
+
+def noop(apps, schema_editor):
+    pass
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0013_indicatorpage_facet_keys'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='indicatorpage',
+            name='search_text',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='methodpage',
+            name='search_text',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='metricpage',
+            name='search_text',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='soppage',
+            name='search_text',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.RunPython(backfill_search_text, noop),
+    ]
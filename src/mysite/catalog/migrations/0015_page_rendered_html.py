@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0014_page_search_text'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='indicatorpage',
+            name='rendered_html',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='methodpage',
+            name='rendered_html',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='metricpage',
+            name='rendered_html',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='soppage',
+            name='rendered_html',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
@@ -1,6 +1,9 @@
 from __future__ import annotations
 
+import hashlib
+
 from django.db import models
+from django.db.models import Q
 from django.core.exceptions import ValidationError
 from django.utils.translation import gettext_lazy as _
 
@@ -14,10 +17,26 @@ from django.contrib.auth import get_user_model
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.forms.models import model_to_dict
+from django.template.loader import render_to_string
 from django.utils import timezone
-from django.http import HttpResponseRedirect
+from django.utils.functional import cached_property
+from django.utils.safestring import mark_safe
+from django.utils.text import Truncator
+from wagtail.signals import page_published, page_unpublished, post_page_move
+
+from .anchor_redirects import section_redirect
+from .cache_utils import FRAGMENTS, INDICATORS, bump_version, get_version
+from .conditional import ConditionalServeMixin, subtree_scope
+from .richtext_utils import expand_many, list_html, plain_text
+from .tree_utils import load_subtree
+
+
+def facet_key(value):
+    """Normalize a facet value (trim + lower-case) for equality matching."""
+    return (value or "").strip().lower()
 
-class BaseWikiPage(Page):
+
+class BaseWikiPage(ConditionalServeMixin, Page):
     """Minimal base page with common Wagtail configuration only."""
 
     # Keep panels minimal; specific pages will add their own fields
@@ -28,10 +47,164 @@ class BaseWikiPage(Page):
         index.AutocompleteField("title"),
     ]
 
+    # Plain text of the page's searchable rich-text fields, extracted on save so
+    # search result snippets never expand or strip rich text at render time.
+    search_text = models.TextField(blank=True, editable=False)
+
+    @classmethod
+    def search_text_fields(cls):
+        """The body fields of ``search_fields``, in the order they're declared."""
+        return [
+            field.field_name for field in cls.get_searchable_search_fields()
+            if field.field_name != "title"
+        ]
+
+    def extract_search_text(self):
+        texts = (plain_text(getattr(self, name)) for name in self.search_text_fields())
+        return "\n".join(text for text in texts if text)
+
+    # Final HTML of every rich-text field (field name -> HTML), rendered on save,
+    # i.e. when a revision is published, so page views do no rich-text
+    # processing. Read it through ``html``.
+    rendered_html = models.JSONField(default=dict, blank=True, editable=False)
+
+    # Rich-text fields rendered as tidy lists (see richtext_utils.list_html),
+    # with their list tag. The others render like the |richtext filter.
+    rich_text_lists: dict[str, str] = {}
+
+    @classmethod
+    def rich_text_fields(cls):
+        return [
+            field.name for field in cls._meta.get_fields() if isinstance(field, RichTextField)
+        ]
+
+    def rich_text_digest(self):
+        source = "\0".join(getattr(self, name) or "" for name in self.rich_text_fields())
+        return hashlib.md5(source.encode(), usedforsecurity=False).hexdigest()
+
+    def render_rich_text(self):
+        """Render every rich-text field to its final HTML (stored as ``rendered_html``)."""
+        return render_rich_text_many([self])[0]
+
+    def has_current_html(self):
+        rendered = self.rendered_html
+        return bool(rendered) and rendered.get("_digest") == self.rich_text_digest()
+
+    def set_html(self, rendered):
+        self.__dict__["html"] = {
+            name: mark_safe(value) for name, value in rendered.items() if name != "_digest"
+        }
+
+    @cached_property
+    def html(self):
+        """The rendered HTML of each rich-text field, by field name, for templates."""
+        if self.has_current_html():
+            rendered = self.rendered_html
+        else:
+            # The fields changed since the last save (a preview, or a page not
+            # yet backfilled with render_rich_text): render them now.
+            rendered = self.render_rich_text()
+        self.set_html(rendered)
+        return self.__dict__["html"]
+
+    def serializable_data(self):
+        # Both are derived from the rich-text fields on save, so revisions
+        # needn't carry them (a restored revision re-renders when published).
+        data = super().serializable_data()
+        data.pop("search_text", None)
+        data.pop("rendered_html", None)
+        return data
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        # Partial saves (e.g. draft revisions) only refresh the derived text and
+        # HTML when a rich-text field is being written too.
+        if update_fields is None or set(update_fields) & set(self.rich_text_fields()):
+            self.search_text = self.extract_search_text()
+            self.rendered_html = self.render_rich_text()
+            self.__dict__.pop("html", None)
+            if update_fields is not None:
+                kwargs["update_fields"] = set(update_fields) | {"search_text", "rendered_html"}
+        return super().save(*args, **kwargs)
+
     class Meta:
         abstract = True
 
 
+def render_rich_text_many(pages):
+    """
+    ``render_rich_text`` for several pages, with the rich-text fields of all of
+    them expanded together: each type of link or embed they reference is
+    fetched once (see richtext_utils.expand_many).
+    """
+    fields = [(index, name) for index, page in enumerate(pages) for name in page.rich_text_fields()]
+    expanded = expand_many(getattr(pages[index], name) for index, name in fields)
+    rendered = [{"_digest": page.rich_text_digest()} for page in pages]
+    for (index, name), html in zip(fields, expanded):
+        tag = pages[index].rich_text_lists.get(name)
+        if not html:
+            rendered[index][name] = ""
+        elif tag:
+            rendered[index][name] = str(list_html(html, tag))
+        else:
+            # What the |richtext filter renders.
+            rendered[index][name] = render_to_string("wagtailcore/shared/richtext.html", {"html": html})
+    return rendered
+
+
+def prepare_html(pages):
+    """
+    Render, in one batch, the HTML of the ``pages`` about to be shown whose
+    stored HTML is out of date, instead of each rendering its own on access.
+    """
+    stale = [page for page in pages if "html" not in page.__dict__ and not page.has_current_html()]
+    if stale:
+        for page, rendered in zip(stale, render_rich_text_many(stale)):
+            page.set_html(rendered)
+
+
+def pages_linking_to(page):
+    """
+    The catalog pages (specific) whose rich text links to ``page`` or a page
+    below it, from Wagtail's reference index. Their stored HTML holds those
+    pages' URLs.
+    """
+    from wagtail.models import ReferenceIndex
+
+    subtree = Page.objects.filter(path__startswith=page.path)
+    pks = ReferenceIndex.get_references_to_in_bulk(subtree).filter(
+        base_content_type=ContentType.objects.get_for_model(Page),
+    ).values_list("object_id", flat=True)
+    return list(
+        Page.objects.filter(pk__in={int(pk) for pk in pks})
+        .type(IndicatorPage, MetricPage, MethodPage, SOPPage)
+        .specific()
+    )
+
+
+def refresh_linking_html(page):
+    """
+    Re-render the stored HTML of the pages linking to ``page`` or below it,
+    whose URLs may just have changed (a publish with a new slug, a move).
+    """
+    pages = pages_linking_to(page)
+    if not pages:
+        return
+    for linking, rendered in zip(pages, render_rich_text_many(pages)):
+        type(linking).objects.filter(pk=linking.pk).update(rendered_html=rendered)
+    # Fragments are cached per revision, and these pages have no new one.
+    bump_version(FRAGMENTS)
+
+
+# Rendered SOP and Method sections of a metric page are cached per child
+# revision; publishing a child changes its key, so this only bounds how long
+# unreachable fragments linger.
+FRAGMENT_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Length, in words, of the metric excerpts listed on an indicator page.
+METRIC_EXCERPT_WORDS = 25
+
+
 class IndicatorPage(BaseWikiPage):
     parent_page_types = ["home.HomePage"]
     subpage_types = ["catalog.MetricPage"]
@@ -44,6 +217,11 @@ class IndicatorPage(BaseWikiPage):
     indicator_type = models.CharField(max_length=150, blank=True)
     entry_author = models.CharField(max_length=255, blank=True)
 
+    # Normalized copies of dimension / indicator_type, kept in sync on save so the
+    # search filters are a single indexed equality match instead of a Python scan.
+    dimension_key = models.CharField(max_length=150, blank=True, db_index=True, editable=False)
+    indicator_type_key = models.CharField(max_length=150, blank=True, db_index=True, editable=False)
+
     content_panels = BaseWikiPage.content_panels + [
         FieldPanel("description"),
         FieldPanel("dimension"),
@@ -55,9 +233,43 @@ class IndicatorPage(BaseWikiPage):
     ]
 
     search_fields = BaseWikiPage.search_fields + [
-        index.SearchField("description"),
+        index.SearchField("description", boost=2),
     ]
 
+    def save(self, *args, **kwargs):
+        self.dimension_key = facet_key(self.dimension)
+        self.indicator_type_key = facet_key(self.indicator_type)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            # Partial saves (e.g. draft revisions) only persist the keys when the
+            # source value is being written too.
+            update_fields = set(update_fields)
+            if "dimension" in update_fields:
+                update_fields.add("dimension_key")
+            if "indicator_type" in update_fields:
+                update_fields.add("indicator_type_key")
+            kwargs["update_fields"] = update_fields
+        return super().save(*args, **kwargs)
+
+    def get_context(self, request, *args, **kwargs):
+        context = super().get_context(request, *args, **kwargs)
+        # One query for the metrics, shared by the sidebar and the article.
+        # The excerpt is the opening of the stored plain text (the description,
+        # which comes first), so neither the rich text nor its HTML is loaded.
+        metrics = (
+            MetricPage.objects.child_of(self).live().order_by("path")
+            .defer(*MetricPage.search_text_fields(), "rendered_html")
+        )
+        context["metric_summaries"] = [
+            {
+                "title": metric.title,
+                "url": metric.get_url(request),
+                "excerpt": Truncator(metric.search_text.partition("\n")[0]).words(METRIC_EXCERPT_WORDS),
+            }
+            for metric in metrics
+        ]
+        return context
+
     def clean(self):
         super().clean()
         # Limit to max 3 child operational indicators per requirement RF03
@@ -117,32 +329,41 @@ class MetricPage(BaseWikiPage):
     ]
 
     search_fields = BaseWikiPage.search_fields + [
-        index.SearchField("description"),
+        index.SearchField("description", boost=2),
+        index.SearchField("purpose"),
+        index.SearchField("adaptation_tracking_function"),
     ]
 
     template = "catalog/metric_page.html"
 
+    def validator_scope(self):
+        # Related Metrics lists the live sibling metrics.
+        parent_path = self.path[:-Page.steplen]
+        return subtree_scope(self) | Q(path__startswith=parent_path, depth=self.depth)
+
     def get_context(self, request, *args, **kwargs):
         context = super().get_context(request, *args, **kwargs)
-        method_pages = self.get_children().type(MethodPage).live().specific()
-        sop_pages = self.get_children().type(SOPPage).live().specific()
-        parent = self.get_parent().specific if self.get_parent() else None
+        # Parent, sibling metrics and Method/SOP children in a fixed number of
+        # queries, however many there are.
+        subtree = load_subtree(self)
+        method_pages = [child for child in subtree.children if isinstance(child, MethodPage)]
+        sop_pages = [child for child in subtree.children if isinstance(child, SOPPage)]
+        prepare_html([self, *method_pages, *sop_pages])
         related_metrics = []
-        if parent and isinstance(parent, IndicatorPage):
-            related_metrics = (
-                parent.get_children()
-                .type(MetricPage)
-                .live()
-                .exclude(id=self.id)
-                .specific()
-            )
+        if isinstance(subtree.parent, IndicatorPage):
+            related_metrics = [
+                sibling for sibling in subtree.siblings if isinstance(sibling, MetricPage)
+            ]
         context.update(
             {
+                "parent_page": subtree.parent,
                 "method_pages": method_pages,
                 "sop_pages": sop_pages,
-                "method_count": method_pages.count(),
-                "sop_count": sop_pages.count(),
+                "method_count": len(method_pages),
+                "sop_count": len(sop_pages),
                 "related_metrics": related_metrics,
+                "fragment_cache_timeout": FRAGMENT_CACHE_TIMEOUT,
+                "fragments_version": get_version(FRAGMENTS),
             }
         )
         return context
@@ -190,27 +411,32 @@ class MethodPage(BaseWikiPage):
         FieldPanel("resources"),
     ]
 
+    # Rich text is indexed as plain text (RichTextField strips the markup).
+    # Hits are shown under the parent Metric (see search.results).
     search_fields = BaseWikiPage.search_fields + [
-        index.SearchField("description"),
+        index.SearchField("description", boost=1.5),
+        index.SearchField("use_case"),
+        index.SearchField("resources"),
+        index.SearchField("advantages", boost=0.5),
+        index.SearchField("limitations", boost=0.5),
     ]
 
     template = "catalog/method_page.html"
 
     # Rich text rendered as tidy lists (loose paragraphs become bullets).
+    rich_text_lists = {"advantages": "ul", "limitations": "ul", "resources": "ul"}
+
     @property
     def advantages_html(self):
-        from .richtext_utils import render_list
-        return render_list(self.advantages, "ul")
+        return self.html["advantages"]
 
     @property
     def limitations_html(self):
-        from .richtext_utils import render_list
-        return render_list(self.limitations, "ul")
+        return self.html["limitations"]
 
     @property
     def resources_html(self):
-        from .richtext_utils import render_list
-        return render_list(self.resources, "ul")
+        return self.html["resources"]
 
     def clean(self):
         super().clean()
@@ -227,12 +453,10 @@ class MethodPage(BaseWikiPage):
         """
         Display Methods inline on the parent Metric page.
         If a Method URL is accessed directly, redirect to the parent Metric
-        with an anchor to this method section.
+        with an anchor to this method section. (Usually answered before this
+        by catalog.anchor_redirects.)
         """
-        parent = self.get_parent().specific if self.get_parent() else None
-        if parent:
-            return HttpResponseRedirect(f"{parent.url}#method-{self.slug}")
-        return super().serve(request)
+        return section_redirect(self, request) or super().serve(request)
 
     class Meta:
         verbose_name = "Method"
@@ -288,6 +512,21 @@ class SOPPage(BaseWikiPage):
         MultiFieldPanel([FieldPanel("entry_author")], heading="Metadata"),
     ]
 
+    # Rich text is indexed as plain text (RichTextField strips the markup).
+    # Tools and data sources weigh as much as the definition: they are what
+    # people search SOPs for. Hits are shown under the parent Metric.
+    search_fields = BaseWikiPage.search_fields + [
+        index.SearchField("definition", boost=1.5),
+        index.SearchField("data_sources", boost=1.5),
+        index.SearchField("available_tools_and_code", boost=1.5),
+        index.SearchField("activities_and_steps"),
+        index.SearchField("technical_capacity", boost=0.5),
+        index.SearchField("options_enhancing_robustness", boost=0.5),
+        index.SearchField("options_reducing_costs", boost=0.5),
+        index.SearchField("references", boost=0.5),
+        index.SearchField("flagship_method_status", boost=0.5),
+    ]
+
     template = "catalog/sop_page.html"
 
     @property
@@ -299,35 +538,38 @@ class SOPPage(BaseWikiPage):
         return len(re.findall(r"<li", self.activities_and_steps))
 
     # Rich text rendered as tidy lists (loose paragraphs become bullets/numbers).
+    rich_text_lists = {
+        "activities_and_steps": "ol",
+        "options_enhancing_robustness": "ul",
+        "options_reducing_costs": "ul",
+        "data_sources": "ul",
+        "available_tools_and_code": "ul",
+        "references": "ul",
+    }
+
     @property
     def activities_and_steps_html(self):
-        from .richtext_utils import render_list
-        return render_list(self.activities_and_steps, "ol")
+        return self.html["activities_and_steps"]
 
     @property
     def options_enhancing_robustness_html(self):
-        from .richtext_utils import render_list
-        return render_list(self.options_enhancing_robustness, "ul")
+        return self.html["options_enhancing_robustness"]
 
     @property
     def options_reducing_costs_html(self):
-        from .richtext_utils import render_list
-        return render_list(self.options_reducing_costs, "ul")
+        return self.html["options_reducing_costs"]
 
     @property
     def data_sources_html(self):
-        from .richtext_utils import render_list
-        return render_list(self.data_sources, "ul")
+        return self.html["data_sources"]
 
     @property
     def available_tools_and_code_html(self):
-        from .richtext_utils import render_list
-        return render_list(self.available_tools_and_code, "ul")
+        return self.html["available_tools_and_code"]
 
     @property
     def references_html(self):
-        from .richtext_utils import render_list
-        return render_list(self.references, "ul")
+        return self.html["references"]
 
     def clean(self):
         super().clean()
@@ -342,16 +584,31 @@ class SOPPage(BaseWikiPage):
                 raise ValidationError({"title": _("Each Metric can only have one SOP.")})
 
     def serve(self, request):
-        parent = self.get_parent().specific if self.get_parent() else None
-        if parent:
-            return HttpResponseRedirect(f"{parent.url}#sop-{self.slug}")
-        return super().serve(request)
+        return section_redirect(self, request) or super().serve(request)
 
     class Meta:
         verbose_name = "SOP"
         verbose_name_plural = "SOPs"
 
 
+class SectionRedirect(models.Model):
+    """
+    Where the URL of a live Method or SOP redirects to: its section of the
+    parent metric page. Maintained by catalog.anchor_redirects.
+    """
+
+    page = models.OneToOneField(Page, on_delete=models.CASCADE, related_name="+")
+    site = models.ForeignKey("wagtailcore.Site", on_delete=models.CASCADE, related_name="+")
+    path = models.CharField(max_length=255)
+    target = models.CharField(max_length=255)
+
+    class Meta:
+        indexes = [models.Index(fields=["site", "path"])]
+
+    def __str__(self):
+        return f"{self.path} -> {self.target}"
+
+
 class AuditLog(models.Model):
     ACTION_CHOICES = (
         ("create", "Create"),
@@ -402,10 +659,30 @@ def log_page_delete(sender, instance: Page, **kwargs):
         )
 
 
+@receiver(page_published)
+@receiver(page_unpublished)
+@receiver(post_page_move)
+def bump_catalog_version(sender, instance, **kwargs):
+    # Invalidates every cached search result set (see catalog.cache_utils), and
+    # the search filter options when an indicator changes. A move changes which
+    # indicator a metric is listed under.
+    if issubclass(sender, (IndicatorPage, MetricPage, MethodPage, SOPPage)):
+        bump_version()
+    if issubclass(sender, IndicatorPage):
+        bump_version(INDICATORS)
+
+
+@receiver(page_published)
+@receiver(page_unpublished)
+@receiver(post_page_move)
+def refresh_links_on_publish(sender, instance, **kwargs):
+    refresh_linking_html(instance)
+
+
 # Register models with django-auditlog for field-level change tracking
 from auditlog.registry import auditlog
 
-auditlog.register(IndicatorPage)
-auditlog.register(MetricPage)
-auditlog.register(MethodPage)
-auditlog.register(SOPPage)
+auditlog.register(IndicatorPage, exclude_fields=["dimension_key", "indicator_type_key", "search_text", "rendered_html"])
+auditlog.register(MetricPage, exclude_fields=["search_text", "rendered_html"])
+auditlog.register(MethodPage, exclude_fields=["search_text", "rendered_html"])
+auditlog.register(SOPPage, exclude_fields=["search_text", "rendered_html"])
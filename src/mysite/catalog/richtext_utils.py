@@ -2,15 +2,23 @@
 
 Editors don't always use the bullet/number toolbar buttons — many just press
 Enter between items, producing separate ``<p>`` blocks (or ``<br>`` breaks) that
-render as a wall of text. ``render_list`` expands a RichText value to HTML and,
-when it is just loose paragraphs/line-breaks, wraps them in a real ``<ul>`` /
-``<ol>``. Content that already uses a list is returned untouched.
+render as a wall of text. ``list_html`` takes expanded rich text and, when it
+is just loose paragraphs/line-breaks, wraps them in a real ``<ul>`` / ``<ol>``.
+Content that already uses a list is returned untouched.
+
+``expand_many`` expands several rich-text values in one pass, so the page
+links, documents, images and embeds referenced anywhere in them are fetched
+with one query per type in total, rather than per value.
+
+``plain_text`` reduces stored rich text to whitespace-normalized text for
+indexing and excerpts.
 
 This lives as plain model-property logic (not a template tag library) so the dev
 autoreloader picks up changes without a manual server restart.
 """
 from __future__ import annotations
 
+import html
 import re
 
 from django.utils.safestring import mark_safe
@@ -20,17 +28,18 @@ _PARA_RE = re.compile(r"<p\b[^>]*>(.*?)</p>", re.IGNORECASE | re.DOTALL)
 _BR_RE = re.compile(r"<br\s*/?>", re.IGNORECASE)
 _LIST_RE = re.compile(r"<(?:ul|ol|li)\b", re.IGNORECASE)
 _EMPTY_RE = re.compile(r"^(?:\s|&nbsp;|<br\s*/?>)*$", re.IGNORECASE)
+_TAG_RE = re.compile(r"<[^>]*>")
 
 
-def _items(html: str) -> list[str] | None:
+def _items(markup: str) -> list[str] | None:
     """Return the items hidden in plain-paragraph content, or None if not list-like."""
-    paras = [p.strip() for p in _PARA_RE.findall(html)]
+    paras = [p.strip() for p in _PARA_RE.findall(markup)]
     paras = [p for p in paras if not _EMPTY_RE.match(p)]
     if len(paras) >= 2:
         return paras
 
     # A single paragraph (or no <p> wrapper) may still hold <br>-separated items.
-    inner = paras[0] if paras else html
+    inner = paras[0] if paras else markup
     parts = [p.strip() for p in _BR_RE.split(inner)]
     parts = [p for p in parts if not _EMPTY_RE.match(p)]
     if len(parts) >= 2:
@@ -39,19 +48,45 @@ def _items(html: str) -> list[str] | None:
     return None
 
 
-def render_list(richtext_value, tag: str = "ul"):
-    """Expand a RichText value to HTML, turning loose paragraphs into a ``<tag>`` list."""
-    if not richtext_value:
-        return ""
-    html = expand_db_html(richtext_value)
+# Joins the values expanded together. Stored rich text never contains NUL
+# (PostgreSQL text can't), and no link or embed handler emits one.
+_SEPARATOR = "\x00"
+
+
+def expand_many(values) -> list[str]:
+    """
+    ``expand_db_html`` for several values at once. Wagtail's rewriters resolve
+    the references of each link/embed type in one query per call, so expanding
+    the values joined shares those queries between all of them.
+    """
+    values = [value or "" for value in values]
+    if sum(1 for value in values if value) < 2:
+        return [expand_db_html(value) if value else "" for value in values]
+    expanded = expand_db_html(_SEPARATOR.join(values)).split(_SEPARATOR)
+    if len(expanded) != len(values):
+        # A value held the separator after all: expand them one by one.
+        return [expand_db_html(value) if value else "" for value in values]
+    return expanded
 
+
+def list_html(markup: str, tag: str = "ul"):
+    """Turn expanded HTML made of loose paragraphs into a ``<tag>`` list."""
     # Already a real list → leave it alone.
-    if _LIST_RE.search(html):
-        return mark_safe(html)
+    if _LIST_RE.search(markup):
+        return mark_safe(markup)
 
-    items = _items(html)
+    items = _items(markup)
     if not items:
-        return mark_safe(html)
+        return mark_safe(markup)
 
     body = "".join(f"<li>{item}</li>" for item in items)
     return mark_safe(f"<{tag}>{body}</{tag}>")
+
+
+def plain_text(value) -> str:
+    """Strip the markup from a rich-text (or plain) value, collapsing whitespace."""
+    if not value:
+        return ""
+    # Tags become spaces so "<li>a</li><li>b</li>" doesn't merge into "ab".
+    text = html.unescape(_TAG_RE.sub(" ", str(value)))
+    return " ".join(text.split())
@@ -0,0 +1,40 @@
+"""Test helpers shared by the catalog and home test suites."""
+from __future__ import annotations
+
+from wagtail.models import Site
+
+from .models import IndicatorPage, MethodPage, MetricPage, SOPPage
+
+
+class CatalogTreeMixin:
+    """
+    For ``WagtailPageTestCase``s: ``create_catalog_tree()`` publishes, under
+    the default site's root page (``self.homepage``)::
+
+        indicator  "Water access"
+            metric     "Piped water"
+                method     "Household survey"
+                sop        "SOP: piped water"
+            sibling    "Standpipes"
+        other      "Sanitation"
+    """
+
+    def create_catalog_tree(self):
+        self.homepage = Site.objects.get(is_default_site=True).root_page.specific
+        owner = self.create_test_user()
+        self.indicator = IndicatorPage(title="Water access", owner=owner)
+        self.homepage.add_child(instance=self.indicator)
+        self.metric = MetricPage(title="Piped water", owner=owner)
+        self.indicator.add_child(instance=self.metric)
+        self.method = MethodPage(title="Household survey")
+        self.metric.add_child(instance=self.method)
+        self.sop = SOPPage(title="SOP: piped water", definition="<p>Definition v1</p>")
+        self.metric.add_child(instance=self.sop)
+        self.sibling = MetricPage(title="Standpipes", owner=owner)
+        self.indicator.add_child(instance=self.sibling)
+        self.other = IndicatorPage(title="Sanitation", owner=owner)
+        self.homepage.add_child(instance=self.other)
+        for page in (
+            self.homepage, self.indicator, self.metric, self.method, self.sop, self.sibling, self.other,
+        ):
+            page.save_revision().publish()
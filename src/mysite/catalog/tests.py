@@ -0,0 +1,501 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from home.models import HomePage
+from catalog.anchor_redirects import lookup
+from catalog.models import IndicatorPage, MethodPage, MetricPage, SectionRedirect, SOPPage, prepare_html
+from catalog.richtext_utils import expand_many
+from catalog.testing import CatalogTreeMixin
+from catalog.tree_utils import load_subtree
+
+from wagtail.models import Page, Site
+from wagtail.test.utils import WagtailPageTestCase
+
+
+class IndicatorFacetKeyTests(WagtailPageTestCase):
+    """
+    Tests for the normalized facet keys stored on IndicatorPage.
+    """
+
+    def setUp(self):
+        root_page = Page.objects.get(pk=1)
+        self.homepage = HomePage(title="Catalog", slug="catalog")
+        root_page.add_child(instance=self.homepage)
+
+    def test_keys_follow_source_fields(self):
+        indicator = IndicatorPage(title="Water access", dimension=" Resilience ", indicator_type="Outcome")
+        self.homepage.add_child(instance=indicator)
+        indicator.refresh_from_db()
+        self.assertEqual(indicator.dimension_key, "resilience")
+        self.assertEqual(indicator.indicator_type_key, "outcome")
+
+        indicator.dimension = "Capacity"
+        indicator.save(update_fields=["dimension"])
+        indicator.refresh_from_db()
+        self.assertEqual(indicator.dimension_key, "capacity")
+
+    def test_partial_save_leaves_keys_alone(self):
+        indicator = IndicatorPage(title="Crop yields", dimension="Resilience")
+        self.homepage.add_child(instance=indicator)
+        # A draft save writes bookkeeping fields only; the live keys must not change.
+        indicator.dimension = "Draft value"
+        indicator.save(update_fields=["title"])
+        indicator.refresh_from_db()
+        self.assertEqual(indicator.dimension_key, "resilience")
+
+
+class SearchTextTests(WagtailPageTestCase):
+    """
+    Tests for the plain-text body stored on catalog pages for search snippets.
+    """
+
+    def setUp(self):
+        root_page = Page.objects.get(pk=1)
+        self.homepage = HomePage(title="Catalog", slug="catalog")
+        root_page.add_child(instance=self.homepage)
+        self.indicator = IndicatorPage(title="Water access")
+        self.homepage.add_child(instance=self.indicator)
+
+    def test_extracted_from_body_fields_in_order(self):
+        metric = MetricPage(
+            title="Piped water",
+            description="<p>Share of <b>households</b></p><ul><li>urban</li><li>rural</li></ul>",
+            purpose="<p>Tracks access &amp; equity.</p>",
+        )
+        self.indicator.add_child(instance=metric)
+        metric.refresh_from_db()
+        self.assertEqual(metric.search_text, "Share of households urban rural\nTracks access & equity.")
+
+    def test_updated_on_publish_not_on_draft(self):
+        self.indicator.description = "<p>Published text</p>"
+        self.indicator.save_revision().publish()
+        self.indicator.description = "<p>Draft text</p>"
+        self.indicator.save_revision()
+        self.indicator.refresh_from_db()
+        self.assertEqual(self.indicator.search_text, "Published text")
+
+
+class MetricPageRenderTests(WagtailPageTestCase):
+    """
+    Rendering a metric page loads its parent, siblings and children in a fixed
+    number of queries.
+    """
+
+    def setUp(self):
+        root_page = Page.objects.get(pk=1)
+        self.homepage = HomePage(title="Catalog", slug="catalog")
+        root_page.add_child(instance=self.homepage)
+        self.indicator = IndicatorPage(title="Water access", indicator_type="Outcome")
+        self.homepage.add_child(instance=self.indicator)
+        self.metric = MetricPage(
+            title="Piped water", description="<p>Share of households</p>", owner=self.create_test_user()
+        )
+        self.indicator.add_child(instance=self.metric)
+        self.metric.add_child(instance=MethodPage(title="Household survey", description="<p>Survey</p>"))
+        self.metric.add_child(instance=SOPPage(title="SOP: piped water", definition="<p>Definition</p>"))
+        self.indicator.add_child(instance=MetricPage(title="Standpipes"))
+
+    def render(self):
+        metric = Page.objects.get(pk=self.metric.pk).specific
+        request = RequestFactory().get("/")
+        cache.clear()  # site root paths are cached across requests
+        with CaptureQueriesContext(connection) as queries:
+            response = metric.serve(request)
+            response.render()
+        return response, len(queries)
+
+    def test_subtree_is_specific_and_in_tree_order(self):
+        sibling = MetricPage.objects.get(title="Standpipes")
+        draft = MetricPage(title="Draft metric", live=False)
+        self.indicator.add_child(instance=draft)
+        metric = Page.objects.get(pk=self.metric.pk).specific
+        with self.assertNumQueries(5):  # the tree, then Indicator, Metric, Method, SOP rows
+            subtree = load_subtree(metric)
+        self.assertIsInstance(subtree.parent, IndicatorPage)
+        self.assertEqual(subtree.siblings, [sibling])
+        self.assertEqual(
+            [type(child) for child in subtree.children], [MethodPage, SOPPage]
+        )
+        with self.assertNumQueries(0):
+            self.assertEqual(metric.get_parent(), subtree.parent)
+
+    def test_query_count_does_not_grow_with_the_tree(self):
+        response, baseline = self.render()
+        self.assertContains(response, "Household survey")
+        self.assertContains(response, "Water access")
+
+        self.indicator.add_child(instance=MetricPage(title="Sibling 1"))
+        for n in range(3):
+            self.metric.add_child(instance=MethodPage(title=f"Method {n}"))
+        response, queries = self.render()
+        self.assertContains(response, "Sibling 1")
+        self.assertContains(response, "Method 2")
+        self.assertEqual(queries, baseline)
+
+
+class FragmentCacheTests(WagtailPageTestCase):
+    """
+    SOP and Method sections of a metric page are cached per child revision.
+    """
+
+    def setUp(self):
+        cache.clear()
+        root_page = Page.objects.get(pk=1)
+        self.homepage = HomePage(title="Catalog", slug="catalog")
+        root_page.add_child(instance=self.homepage)
+        indicator = IndicatorPage(title="Water access")
+        self.homepage.add_child(instance=indicator)
+        self.metric = MetricPage(title="Piped water", owner=self.create_test_user())
+        indicator.add_child(instance=self.metric)
+        self.survey = MethodPage(title="Household survey", description="<p>Survey v1</p>")
+        self.metric.add_child(instance=self.survey)
+        self.census = MethodPage(title="Census", description="<p>Census v1</p>")
+        self.metric.add_child(instance=self.census)
+        self.sop = SOPPage(title="SOP: piped water", definition="<p>Definition v1</p>")
+        self.metric.add_child(instance=self.sop)
+
+    def render(self):
+        metric = Page.objects.get(pk=self.metric.pk).specific
+        response = metric.serve(RequestFactory().get("/"))
+        return response.render().content.decode()
+
+    def change_stored_html(self, page, text):
+        # Rewrite the stored HTML without a new revision: only a cache miss shows it.
+        page.refresh_from_db()
+        html = {**page.rendered_html}
+        html.update({name: value.replace("v1", text) for name, value in html.items() if name != "_digest"})
+        type(page).objects.filter(pk=page.pk).update(rendered_html=html)
+
+    def test_untouched_fragments_are_reused_after_a_sibling_publish(self):
+        self.render()
+        self.change_stored_html(self.census, "stale")
+        self.change_stored_html(self.sop, "stale")
+
+        self.survey.description = "<p>Survey v2</p>"
+        self.survey.save_revision().publish()
+        content = self.render()
+        self.assertIn("Survey v2", content)
+        self.assertIn("Census v1", content)
+        self.assertIn("Definition v1", content)
+
+    def test_backfill_invalidates_fragments(self):
+        self.render()
+        SOPPage.objects.filter(pk=self.sop.pk).update(definition="<p>Definition v2</p>")
+        self.assertIn("Definition v1", self.render())
+        call_command("render_rich_text", stale=True, stdout=StringIO())
+        self.assertIn("Definition v2", self.render())
+
+
+class IndicatorPageRenderTests(WagtailPageTestCase):
+    """
+    An indicator page lists its metrics from one prefetched summary list.
+    """
+
+    def setUp(self):
+        root_page = Page.objects.get(pk=1)
+        self.homepage = HomePage(title="Catalog", slug="catalog")
+        root_page.add_child(instance=self.homepage)
+        self.indicator = IndicatorPage(title="Water access", owner=self.create_test_user())
+        self.homepage.add_child(instance=self.indicator)
+        self.indicator.add_child(instance=MetricPage(
+            title="Piped water", description="<p>Share of <b>households</b> with piped water.</p>"
+        ))
+        self.indicator.add_child(instance=MetricPage(title="Draft metric", live=False))
+
+    def render(self):
+        indicator = Page.objects.get(pk=self.indicator.pk).specific
+        cache.clear()  # site root paths are cached across requests
+        with CaptureQueriesContext(connection) as queries:
+            response = indicator.serve(RequestFactory().get("/"))
+            response.render()
+        self.queries = queries
+        return response, len(queries)
+
+    def test_metric_summaries(self):
+        with mock.patch("catalog.models.plain_text") as strip:
+            response, _ = self.render()
+        strip.assert_not_called()
+        # Excerpts come from the stored plain text, not the rich-text columns.
+        metric_queries = [query["sql"] for query in self.queries if "catalog_metricpage" in query["sql"]]
+        self.assertTrue(metric_queries)
+        for sql in metric_queries:
+            self.assertNotIn("rendered_html", sql)
+            self.assertNotIn('"description"', sql)
+        summaries = response.context_data["metric_summaries"]
+        self.assertEqual(
+            [(summary["title"], summary["excerpt"]) for summary in summaries],
+            [("Piped water", "Share of households with piped water.")],
+        )
+        self.assertContains(response, "Share of households with piped water.", count=1)
+        self.assertContains(response, "#metric-1", count=1)
+
+    def test_query_count_does_not_grow_with_metrics(self):
+        _, baseline = self.render()
+        self.indicator.add_child(instance=MetricPage(title="Standpipes"))
+        response, queries = self.render()
+        self.assertContains(response, "Standpipes")
+        self.assertEqual(queries, baseline)
+
+
+class RenderedHtmlTests(WagtailPageTestCase):
+    """
+    Catalog pages store the rendered HTML of their rich-text fields on publish.
+    """
+
+    def setUp(self):
+        root_page = Page.objects.get(pk=1)
+        self.homepage = HomePage(title="Catalog", slug="catalog")
+        root_page.add_child(instance=self.homepage)
+        self.indicator = IndicatorPage(title="Water access")
+        self.homepage.add_child(instance=self.indicator)
+        self.metric = MetricPage(title="Piped water")
+        self.indicator.add_child(instance=self.metric)
+        self.sop = SOPPage(
+            title="SOP: piped water",
+            definition="<p>Share of households</p>",
+            activities_and_steps="<p>Sample</p><p>Survey</p>",
+        )
+        self.metric.add_child(instance=self.sop)
+
+    def test_rendered_on_publish(self):
+        self.sop.definition = "<p>Published definition</p>"
+        self.sop.save_revision().publish()
+        self.sop.definition = "<p>Draft definition</p>"
+        self.sop.save_revision()
+        sop = SOPPage.objects.get(pk=self.sop.pk)
+        self.assertIn("Published definition", sop.rendered_html["definition"])
+        self.assertEqual(sop.rendered_html["activities_and_steps"], "<ol><li>Sample</li><li>Survey</li></ol>")
+        self.assertEqual(sop.rendered_html["references"], "")
+
+    def test_views_read_the_stored_html(self):
+        sop = SOPPage.objects.get(pk=self.sop.pk)
+        with mock.patch("catalog.models.expand_many") as expand_many:
+            self.assertEqual(sop.activities_and_steps_html, "<ol><li>Sample</li><li>Survey</li></ol>")
+            self.assertIn("Share of households", sop.html["definition"])
+        expand_many.assert_not_called()
+
+    def test_unsaved_changes_render_on_the_fly(self):
+        # E.g. a preview: the instance holds edits the stored HTML predates.
+        sop = SOPPage.objects.get(pk=self.sop.pk)
+        sop.definition = "<p>Previewed definition</p>"
+        self.assertIn("Previewed definition", sop.html["definition"])
+
+    def test_backfill_command(self):
+        SOPPage.objects.filter(pk=self.sop.pk).update(rendered_html={}, search_text="")
+        out = StringIO()
+        call_command("render_rich_text", stale=True, stdout=out)
+        self.assertIn("Rendered 1 pages.", out.getvalue())
+        sop = SOPPage.objects.get(pk=self.sop.pk)
+        self.assertIn("Share of households", sop.rendered_html["definition"])
+        self.assertTrue(sop.search_text.startswith("Share of households"))
+
+    def link(self, page):
+        return f'<p>See <a linktype="page" id="{page.pk}">{page.title}</a></p>'
+
+    def test_links_are_resolved_once_for_all_fields(self):
+        def expansion_queries(values):
+            with CaptureQueriesContext(connection) as queries:
+                expanded = expand_many(values)
+            return expanded, len(queries)
+
+        links = [self.link(page) for page in (self.indicator, self.metric, self.homepage)]
+        # One value linking to all three pages: a query per page type.
+        _, single = expansion_queries(["".join(links)])
+        values = links * 4
+        expanded, batched = expansion_queries(values)
+        self.assertEqual(batched, single)
+        self.assertEqual(len(expanded), len(values))
+        self.assertIn(f'href="{self.metric.url}"', expanded[1])
+
+    def test_stale_children_render_in_one_batch(self):
+        sop = SOPPage.objects.get(pk=self.sop.pk)
+        sop.references = self.link(self.indicator)
+        sop.data_sources = self.link(self.metric)
+        metric = MetricPage.objects.get(pk=self.metric.pk)
+        with mock.patch("catalog.models.expand_many", wraps=expand_many) as batch:
+            prepare_html([metric, sop])
+        batch.assert_called_once()
+        self.assertIn(f'href="{self.indicator.url}"', sop.references_html)
+        self.assertIn(f'href="{self.metric.url}"', sop.data_sources_html)
+
+    def serve_catalog(self):
+        # Links to pages outside every site render without a URL.
+        Site.objects.filter(is_default_site=True).update(root_page=self.homepage)
+        Site.clear_site_root_paths_cache()
+
+    def test_linking_pages_follow_a_renamed_target(self):
+        self.serve_catalog()
+        self.sop.references = self.link(self.metric)
+        self.sop.save_revision().publish()
+        self.metric.slug = "tap-water"
+        self.metric.save_revision().publish()
+        sop = SOPPage.objects.get(pk=self.sop.pk)
+        metric = MetricPage.objects.get(pk=self.metric.pk)
+        self.assertIn("tap-water", metric.url)
+        self.assertIn(f'href="{metric.url}"', sop.rendered_html["references"])
+
+    def test_linking_pages_follow_a_moved_target(self):
+        self.serve_catalog()
+        other = IndicatorPage(title="Sanitation")
+        self.homepage.add_child(instance=other)
+        self.indicator.description = self.link(self.sop)
+        self.indicator.save_revision().publish()
+        self.metric.move(other, pos="last-child")
+        indicator = IndicatorPage.objects.get(pk=self.indicator.pk)
+        sop = SOPPage.objects.get(pk=self.sop.pk)
+        self.assertIn("sanitation", sop.url)
+        self.assertIn(f'href="{sop.url}"', indicator.rendered_html["description"])
+
+    def test_revisions_leave_out_derived_fields(self):
+        revision = self.sop.save_revision()
+        self.assertNotIn("rendered_html", revision.content)
+        self.assertNotIn("search_text", revision.content)
+        revision.publish()
+        sop = SOPPage.objects.get(pk=self.sop.pk)
+        self.assertIn("Share of households", sop.rendered_html["definition"])
+        self.assertTrue(sop.search_text.startswith("Share of households"))
+
+
+class GenerateCatalogTests(WagtailPageTestCase):
+    """
+    Tests for the generate_catalog management command.
+    """
+
+    def setUp(self):
+        root_page = Page.objects.get(pk=1)
+        self.homepage = HomePage(title="Catalog", slug="catalog")
+        root_page.add_child(instance=self.homepage)
+
+    def generate(self, **options):
+        call_command("generate_catalog", parent="catalog", stdout=StringIO(), **options)
+
+    def test_generates_live_tree(self):
+        self.generate(indicators=2, metrics=2, methods=1)
+        self.assertEqual(IndicatorPage.objects.live().child_of(self.homepage).count(), 2)
+        self.assertEqual(MetricPage.objects.live().count(), 4)
+        self.assertEqual(MethodPage.objects.live().count(), 4)
+        self.assertEqual(SOPPage.objects.live().count(), 4)
+        self.assertTrue(IndicatorPage.objects.first().description.startswith("<p>"))
+
+    def test_clear_removes_generated_pages(self):
+        manual = IndicatorPage(title="Water access")
+        self.homepage.add_child(instance=manual)
+        self.generate(indicators=2, metrics=1, methods=0)
+        self.generate(clear=True)
+        self.assertEqual(list(IndicatorPage.objects.all()), [manual])
+        self.assertFalse(MetricPage.objects.exists())
+
+
+@override_settings(PAGE_CACHE={"ENABLED": False})
+class ConditionalGetTests(CatalogTreeMixin, WagtailPageTestCase):
+    """
+    Catalog and home pages carry validators derived from what they render.
+    """
+
+    def setUp(self):
+        self.create_catalog_tree()
+
+    def etag(self, page):
+        return self.client.get(page.url)["ETag"]
+
+    def test_revalidation_is_not_rendered(self):
+        response = self.client.get(self.metric.url)
+        self.assertFalse(response.has_header("Last-Modified"))
+        revalidated = self.client.get(self.metric.url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(revalidated.status_code, 304)
+        self.assertTemplateNotUsed(revalidated, "catalog/metric_page.html")
+
+    def test_child_publish_changes_etag(self):
+        metric, indicator, home, other = (
+            self.etag(page) for page in (self.metric, self.indicator, self.homepage, self.other)
+        )
+        self.sop.definition = "<p>Revised</p>"
+        self.sop.save_revision().publish()
+        self.assertNotEqual(self.etag(self.metric), metric)
+        self.assertNotEqual(self.etag(self.indicator), indicator)
+        self.assertNotEqual(self.etag(self.homepage), home)
+        self.assertEqual(self.etag(self.other), other)
+
+    def test_child_unpublish_changes_etag(self):
+        metric = self.etag(self.metric)
+        self.sop.unpublish()
+        self.assertNotEqual(self.etag(self.metric), metric)
+
+    def test_deploy_changes_etag(self):
+        metric = self.etag(self.metric)
+        with override_settings(SITE_VERSION="2f1c9e0"):
+            self.assertNotEqual(self.etag(self.metric), metric)
+
+    def test_editors_get_no_validators(self):
+        self.client.force_login(self.metric.owner)
+        self.assertFalse(self.client.get(self.metric.url).has_header("ETag"))
+
+
+@override_settings(PAGE_CACHE={"ENABLED": False})
+class AnchorRedirectTests(CatalogTreeMixin, WagtailPageTestCase):
+    """
+    Method and SOP URLs redirect to their section of the metric page without
+    reaching Wagtail.
+    """
+
+    def setUp(self):
+        self.create_catalog_tree()
+        self.site = Site.objects.get(is_default_site=True)
+
+    def refresh(self, page):
+        return Page.objects.get(pk=page.pk).specific
+
+    def lookup(self, path):
+        return lookup(self.site, path)
+
+    def test_redirect_without_routing(self):
+        # The site and the redirect.
+        with self.assertNumQueries(2):
+            response = self.client.get(self.sop.url)
+        self.assertRedirects(
+            response, f"{self.metric.url}#sop-{self.sop.slug}", fetch_redirect_response=False
+        )
+        self.assertEqual(self.lookup(self.method.url), f"{self.metric.url}#method-{self.method.slug}")
+
+    def test_metric_slug_change_updates_children(self):
+        old_url = self.method.url
+        self.metric.slug = "piped-water-supply"
+        self.metric.save_revision().publish()
+        method = self.refresh(self.method)
+        self.assertIsNone(self.lookup(old_url))
+        self.assertEqual(self.lookup(method.url), f"/water-access/piped-water-supply/#method-{method.slug}")
+
+    def test_unpublish_drops_entry(self):
+        self.sop.unpublish()
+        self.assertIsNone(self.lookup(self.sop.url))
+        self.assertEqual(self.client.get(self.sop.url).status_code, 404)
+
+    def test_delete_drops_entry(self):
+        url = self.sop.url
+        self.sop.delete()
+        self.assertFalse(SectionRedirect.objects.filter(page=self.sop.pk).exists())
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_move_updates_entry(self):
+        old_url = self.method.url
+        self.method.move(self.sibling, pos="last-child")
+        method = self.refresh(self.method)
+        self.assertIsNone(self.lookup(old_url))
+        self.assertEqual(self.lookup(method.url), f"{self.sibling.url}#method-{method.slug}")
+
+    def test_entries_belong_to_their_site(self):
+        Site.objects.create(hostname="other.example", root_page=self.other)
+        response = self.client.get(self.sop.url, HTTP_HOST="other.example")
+        self.assertEqual(response.status_code, 404)
+
+    def test_missing_entry_is_restored_by_serve(self):
+        SectionRedirect.objects.all().delete()
+        response = self.client.get(self.method.url)
+        target = f"{self.metric.url}#method-{self.method.slug}"
+        self.assertRedirects(response, target, fetch_redirect_response=False)
+        self.assertEqual(self.lookup(self.method.url), target)
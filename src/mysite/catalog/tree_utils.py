@@ -0,0 +1,83 @@
+"""Tree-aware query helpers for the Indicator → Metric → Method/SOP hierarchy.
+
+Wagtail stores the page tree as materialized paths (treebeard ``MP_Node``): a
+page's parent is the page whose ``path`` is its own path minus the last
+``steplen`` characters, one ``depth`` up. These helpers express parent/child
+relationships between two querysets as a correlated ``EXISTS`` on that indexed
+path, so "metrics under these indicators" is a single SQL statement whatever
+the number of matching parents (rather than one ``path__startswith`` clause per
+parent, or a second query to look the parents up).
+
+``load_subtree`` fetches a page's parent, live siblings and live children in
+one query over the same paths, then one query per page type for the specific
+instances, so rendering a page with its neighbourhood costs a fixed number of
+queries however many siblings and children it has.
+"""
+from __future__ import annotations
+
+from typing import NamedTuple
+
+from django.db.models import Exists, OuterRef, Q
+from django.db.models.functions import Substr
+
+from wagtail.models import Page
+
+
+def _parent_path():
+    """Expression for the parent path of the outer query's page."""
+    return Substr(OuterRef("path"), 1, (OuterRef("depth") - 1) * Page.steplen)
+
+
+def children_of(child_qs, parent_qs):
+    """Narrow ``child_qs`` to pages whose direct parent is in ``parent_qs``."""
+    return child_qs.filter(
+        Exists(parent_qs.filter(path=_parent_path(), depth=OuterRef("depth") - 1))
+    )
+
+
+def parents_of(parent_qs, child_qs):
+    """Narrow ``parent_qs`` to pages with at least one direct child in ``child_qs``."""
+    return parent_qs.filter(
+        Exists(
+            child_qs.filter(
+                path__startswith=OuterRef("path"), depth=OuterRef("depth") + 1
+            )
+        )
+    )
+
+
+class Subtree(NamedTuple):
+    parent: Page | None
+    siblings: list[Page]
+    children: list[Page]
+
+
+def load_subtree(page) -> Subtree:
+    """
+    The parent, live siblings and live children of ``page`` (in tree order), as
+    specific instances. The parent is also cached on ``page``, so templates
+    calling ``page.get_parent`` don't query again.
+    """
+    parent_path = page.path[:-Page.steplen]
+    family = (
+        Page.objects.filter(
+            Q(path=parent_path, depth=page.depth - 1)
+            | Q(live=True, path__startswith=parent_path, depth=page.depth)
+            | Q(live=True, path__startswith=page.path, depth=page.depth + 1)
+        )
+        .exclude(pk=page.pk)
+        .order_by("path")
+        .specific()
+    )
+    parent, siblings, children = None, [], []
+    for relative in family:
+        if relative.depth < page.depth:
+            parent = relative
+        elif relative.depth == page.depth:
+            siblings.append(relative)
+        else:
+            children.append(relative)
+    if parent is not None:
+        # treebeard's MP_Node.get_parent() caches its result on this attribute.
+        page._cached_parent_obj = parent
+    return Subtree(parent, siblings, children)
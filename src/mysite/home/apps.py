@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class HomeConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "home"
+
+    def ready(self):
+        # Connects the page-cache purge receivers.
+        from . import page_cache  # noqa: F401
@@ -6,20 +6,23 @@ from wagtail import blocks
 from wagtail.admin.panels import FieldPanel, MultiFieldPanel
 from wagtail.images.blocks import ImageChooserBlock
 
+from catalog.conditional import ConditionalServeMixin
 
-class HomePage(Page):
+
+class HomePage(ConditionalServeMixin, Page):
     def get_context(self, request):
         context = super().get_context(request)
         
         # Import IndicatorPage model
         from django.core.cache import cache
+        from catalog.cache_utils import get_version
         from catalog.models import IndicatorPage, MetricPage, SOPPage
 
         # Get the latest 3 published indicators
         context['latest_entries'] = IndicatorPage.objects.live().order_by('-first_published_at')[:3]
 
         # Automatic statistics counts (cached for 5 minutes)
-        cache_key = 'home_stats_v1'
+        cache_key = f'home_stats_v1:{get_version()}'
         stats = cache.get(cache_key)
         if not stats:
             stats = {
@@ -0,0 +1,169 @@
+"""Full-response cache of Wagtail-served pages for anonymous visitors.
+
+``PageCacheMiddleware`` answers an anonymous ``GET`` from the shared cache
+before Wagtail routes the request, and stores what Wagtail serves: a ``200``
+from the ``wagtail_serve`` view, for a URL without a query string, that sets no
+cookies and isn't marked private. Requests carrying a session cookie (editors,
+or visitors with pending messages) and previews always go through the full
+stack.
+
+Entries are keyed by URL path under a per-path version counter (see
+``catalog.cache_utils``), so purging a page's URL is one version bump that
+drops its entry on every host. Counters are only created when a page is
+stored, and expire some time after its entries, so requests for arbitrary
+URLs leave nothing behind. Publishing, unpublishing or moving a page
+purges the URLs of every page that renders it:
+
+* the page itself;
+* its ancestors, which list their children (indicator → metrics) or count and
+  feature them (the home page);
+* its children, which show its title (breadcrumbs, "Parent Indicator");
+* for a metric, its sibling metrics ("Related Metrics");
+* catalog pages whose rich text links to it or a page below it (Wagtail's
+  reference index), whose stored HTML is re-rendered with the new URLs.
+
+So a published SOP purges its metric (where it is rendered), the indicator and
+the home page. The search page is a plain Django view with its own versioned
+result cache.
+
+Settings (``PAGE_CACHE``): ``ENABLED``, ``TIMEOUT``.
+"""
+from __future__ import annotations
+
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.dispatch import receiver
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+
+from wagtail.models import Page
+from wagtail.signals import page_published, page_unpublished, post_page_move, pre_page_move
+
+from catalog.cache_utils import bump_version, get_version, peek_version
+
+DEFAULTS = {"ENABLED": True, "TIMEOUT": 60 * 10}
+
+CACHE_HEADER = "X-Page-Cache"
+# Response headers worth replaying from the cache.
+STORED_HEADERS = (
+    "Content-Type", "Content-Language", "X-Frame-Options", "Vary", "Cache-Control",
+    "ETag",
+)
+
+
+def _setting(name):
+    return getattr(settings, "PAGE_CACHE", {}).get(name, DEFAULTS[name])
+
+
+def _version_name(path):
+    return "page:" + hashlib.md5(path.encode(), usedforsecurity=False).hexdigest()
+
+
+def _cache_key(request, version):
+    return f"pagecache:{version}:{request.get_host()}:{request.path}"
+
+
+def _cacheable_request(request):
+    return (
+        _setting("ENABLED")
+        and request.method == "GET"
+        and not request.META.get("QUERY_STRING")
+        and settings.SESSION_COOKIE_NAME not in request.COOKIES
+        and "messages" not in request.COOKIES
+    )
+
+
+def _cacheable_response(request, response):
+    match = getattr(request, "resolver_match", None)
+    cache_control = response.get("Cache-Control", "")
+    return (
+        match is not None
+        and match.url_name == "wagtail_serve"
+        and response.status_code == 200
+        and not response.streaming
+        and not response.cookies
+        and "private" not in cache_control
+        and "no-store" not in cache_control
+        and not getattr(request, "is_preview", False)
+    )
+
+
+class PageCacheMiddleware:
+    """Serve and store anonymous page views (see the module docstring)."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not _cacheable_request(request):
+            return self.get_response(request)
+
+        # Any URL can be requested: only storing a page creates its counter.
+        version = peek_version(_version_name(request.path))
+        cached = cache.get(_cache_key(request, version)) if version is not None else None
+        if cached is not None:
+            headers, content = cached
+            response = HttpResponse(content, headers=headers)
+            response[CACHE_HEADER] = "hit"
+            # Revalidations of a cached page (see catalog.conditional) get
+            # their 304 here.
+            return get_conditional_response(request, etag=headers.get("ETag"), response=response)
+
+        response = self.get_response(request)
+        if _cacheable_response(request, response):
+            headers = {name: response[name] for name in STORED_HEADERS if response.has_header(name)}
+            # The counter outlives the entries stored under it; once it
+            # expires they're unreachable, and a new one starts ahead of it.
+            version = get_version(_version_name(request.path), timeout=2 * _setting("TIMEOUT"))
+            cache.set(_cache_key(request, version), (headers, response.content), _setting("TIMEOUT"))
+            response[CACHE_HEADER] = "miss"
+        return response
+
+
+def _page_paths(pages):
+    paths = set()
+    for page in pages:
+        parts = page.get_url_parts()
+        if parts and parts[2]:
+            paths.add(parts[2])
+    return paths
+
+
+def purge_paths(paths):
+    for path in paths:
+        bump_version(_version_name(path), create=False)
+
+
+def dependent_pages(page):
+    """``page`` and the pages that render part of it (see the module docstring)."""
+    from catalog.models import MetricPage, pages_linking_to
+
+    pages = [page, *page.get_ancestors().filter(depth__gt=1), *page.get_children()]
+    if issubclass(page.specific_class or Page, MetricPage):
+        pages.extend(page.get_siblings(inclusive=False))
+    pages.extend(pages_linking_to(page))
+    return pages
+
+
+@receiver(page_published)
+@receiver(page_unpublished)
+def purge_on_publish(sender, instance, **kwargs):
+    if _setting("ENABLED"):
+        purge_paths(_page_paths(dependent_pages(instance)))
+
+
+@receiver(pre_page_move)
+def purge_before_move(sender, instance, **kwargs):
+    # The old URLs of the page and everything below it stop resolving, and the
+    # old parent loses a child.
+    if _setting("ENABLED"):
+        pages = dependent_pages(instance) + list(instance.get_descendants())
+        purge_paths(_page_paths(pages))
+
+
+@receiver(post_page_move)
+def purge_after_move(sender, instance, **kwargs):
+    if _setting("ENABLED"):
+        purge_paths(_page_paths(dependent_pages(instance)))
@@ -1,6 +1,14 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
 from django.urls import reverse
 from home.models import HomePage
+from home.page_cache import CACHE_HEADER, _version_name
 
+from catalog.cache_utils import peek_version
+from catalog.models import SOPPage
+from catalog.testing import CatalogTreeMixin
 from wagtail.models import Page
 from wagtail.test.utils import WagtailPageTestCase
 
@@ -41,3 +49,98 @@ class HomeTests(WagtailPageTestCase):
     def test_homepage_template_used(self):
         response = self.client.get(reverse("home"))
         self.assertTemplateUsed(response, "home/home_page.html")
+
+
+class PageCacheTests(CatalogTreeMixin, WagtailPageTestCase):
+    """
+    Anonymous page views are served from the full-page cache until a publish
+    purges them.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.create_catalog_tree()
+
+    def get(self, page, **kwargs):
+        return self.client.get(page.url, **kwargs)
+
+    def test_second_view_is_a_hit(self):
+        first = self.get(self.metric)
+        second = self.get(self.metric)
+        self.assertEqual(first[CACHE_HEADER], "miss")
+        self.assertEqual(second[CACHE_HEADER], "hit")
+        self.assertEqual(first.content, second.content)
+        self.assertEqual(second["Content-Type"], first["Content-Type"])
+
+    def test_unknown_urls_create_no_counters(self):
+        self.assertEqual(self.client.get("/no-such-page/").status_code, 404)
+        self.assertIsNone(peek_version(_version_name("/no-such-page/")))
+        self.get(self.metric)
+        self.assertIsNotNone(peek_version(_version_name(self.metric.url)))
+
+    def test_bypassed_for_sessions_and_query_strings(self):
+        self.get(self.metric)
+        self.client.force_login(self.indicator.owner)
+        self.assertFalse(self.get(self.metric).has_header(CACHE_HEADER))
+        self.client.logout()
+        self.assertFalse(self.client.get(self.metric.url + "?page=2").has_header(CACHE_HEADER))
+
+    def test_sop_publish_purges_dependent_pages(self):
+        pages = (self.homepage, self.indicator, self.metric, self.sibling, self.other)
+        for page in pages:
+            self.get(page)
+
+        self.sop.definition = "<p>Definition v2</p>"
+        self.sop.save_revision().publish()
+
+        self.assertEqual(self.get(self.metric)[CACHE_HEADER], "miss")
+        self.assertIn("Definition v2", self.get(self.metric).content.decode())
+        self.assertEqual(self.get(self.indicator)[CACHE_HEADER], "miss")
+        self.assertEqual(self.get(self.homepage)[CACHE_HEADER], "miss")
+        # Pages that don't show the SOP keep their entries.
+        self.assertEqual(self.get(self.sibling)[CACHE_HEADER], "hit")
+        self.assertEqual(self.get(self.other)[CACHE_HEADER], "hit")
+
+    def test_rich_text_backfill_purges_rendered_pages(self):
+        self.get(self.metric)
+        SOPPage.objects.filter(pk=self.sop.pk).update(
+            definition="<p>Definition v2</p>", rendered_html={},
+        )
+        call_command("render_rich_text", stale=True, stdout=StringIO())
+        response = self.get(self.metric)
+        self.assertEqual(response[CACHE_HEADER], "miss")
+        self.assertIn("Definition v2", response.content.decode())
+
+    def test_metric_publish_purges_siblings(self):
+        self.get(self.sibling)
+        self.metric.title = "Piped water supply"
+        self.metric.save_revision().publish()
+        self.assertEqual(self.get(self.sibling)[CACHE_HEADER], "miss")
+
+    def test_publish_purges_linking_pages(self):
+        self.other.description = f'<p>See <a linktype="page" id="{self.metric.pk}">piped water</a></p>'
+        self.other.save_revision().publish()
+        self.get(self.other)
+        self.metric.slug = "tap-water"
+        self.metric.save_revision().publish()
+        response = self.get(self.other)
+        self.assertEqual(response[CACHE_HEADER], "miss")
+        self.assertIn('href="/water-access/tap-water/"', response.content.decode())
+
+    def test_move_purges_old_and_new_parents(self):
+        self.get(self.indicator)
+        self.get(self.other)
+        old_url = self.sibling.url
+        self.client.get(old_url)
+
+        self.sibling.move(self.other, pos="last-child")
+
+        self.assertEqual(self.get(self.indicator)[CACHE_HEADER], "miss")
+        self.assertEqual(self.get(self.other)[CACHE_HEADER], "miss")
+        # No longer served from the cache (Wagtail redirects the old URL).
+        self.assertNotEqual(self.client.get(old_url).status_code, 200)
+
+    def test_hit_answers_revalidation(self):
+        self.metric.save_revision().publish()
+        etag = self.get(self.metric)["ETag"]
+        self.assertEqual(self.get(self.metric, HTTP_IF_NONE_MATCH=etag).status_code, 304)
@@ -0,0 +1,231 @@
+"""Per-client rate limiting and load shedding for the public endpoints.
+
+``rate_limit(scope)`` gives every client IP a token bucket per scope: a request
+spends one token, tokens refill at ``RATE`` per second up to ``BURST``, and a
+request that finds the bucket empty gets a 429 with ``Retry-After``. Buckets
+live in the default cache, so with the shared production cache every gunicorn
+worker draws from the same bucket. (Cache reads and writes aren't atomic across
+workers, so a burst of simultaneous requests can overspend by a token or two.)
+
+``shed_load(scope)`` caps how many requests of a scope run at once across all
+workers (``CONCURRENCY``). Anything beyond the cap is answered at once with a
+503 and ``Retry-After`` instead of tying up a worker, so the few sync workers
+stay available for ordinary page views. A streaming response (a search export)
+keeps its slot until its body has been sent. The slots are database rows
+(``search.models.ConcurrencySlot``) claimed with a conditional ``UPDATE``,
+which is atomic whatever the cache backend, and each claim is a lease: a slot
+its worker never released (killed mid-request) is free again after
+``CONCURRENCY_TIMEOUT``, so lost releases can't leave the cap permanently full.
+Streaming responses renew their lease as they go.
+
+The client IP is taken from ``X-Forwarded-For`` when the site is served behind
+``TRUSTED_PROXIES`` reverse proxies: each proxy appends the address it saw, so
+the entry that many places from the right is the one a client can't forge.
+
+Settings (``RATE_LIMIT``): ``ENABLED``, ``TRUSTED_PROXIES``, ``BUCKETS``
+(scope -> ``{"RATE", "BURST"}``), ``CONCURRENCY`` (scope -> cap) and
+``CONCURRENCY_TIMEOUT``.
+"""
+from __future__ import annotations
+
+import math
+import time
+import uuid
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils import timezone
+
+DEFAULTS = {
+    "ENABLED": True,
+    "TRUSTED_PROXIES": 1,
+    "BUCKETS": {},
+    "CONCURRENCY": {},
+    # Seconds a concurrency slot is held at most, should a worker die without
+    # releasing it (gunicorn's --timeout).
+    "CONCURRENCY_TIMEOUT": 120,
+}
+
+
+def _setting(name):
+    return getattr(settings, "RATE_LIMIT", {}).get(name, DEFAULTS[name])
+
+
+def client_ip(request) -> str:
+    """The client address, as seen by the outermost trusted proxy."""
+    proxies = _setting("TRUSTED_PROXIES")
+    forwarded = request.META.get("HTTP_X_FORWARDED_FOR", "")
+    if proxies and forwarded:
+        hops = [hop.strip() for hop in forwarded.split(",") if hop.strip()]
+        if hops:
+            return hops[-min(proxies, len(hops))]
+    return request.META.get("REMOTE_ADDR", "")
+
+
+def _retry_response(status, message, retry_after):
+    response = HttpResponse(message, status=status, content_type="text/plain; charset=utf-8")
+    response["Retry-After"] = str(max(1, math.ceil(retry_after)))
+    return response
+
+
+def take_token(scope, key) -> float:
+    """
+    Spend one token from ``key``'s bucket in ``scope``. Return 0 if the request
+    may proceed, otherwise the seconds until a token is available.
+    """
+    bucket = _setting("BUCKETS").get(scope)
+    if not bucket:
+        return 0
+    rate, burst = bucket["RATE"], bucket["BURST"]
+    cache_key = f"ratelimit:{scope}:{key}"
+    now = time.time()
+    tokens, updated = cache.get(cache_key, (burst, now))
+    tokens = min(burst, tokens + (now - updated) * rate)
+    if tokens < 1:
+        return (1 - tokens) / rate
+    # A bucket left alone this long is full again, which is the same as no entry.
+    cache.set(cache_key, (tokens - 1, now), math.ceil(burst / rate) + 1)
+    return 0
+
+
+def rate_limit(scope, methods=None):
+    """
+    Decorate a view so each client IP is limited by the ``scope`` bucket.
+    ``methods`` restricts the limit to those HTTP methods (e.g. form POSTs).
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapped(request, *args, **kwargs):
+            if _setting("ENABLED") and (methods is None or request.method in methods):
+                wait = take_token(scope, client_ip(request))
+                if wait:
+                    return _retry_response(429, "Too many requests. Please slow down.", wait)
+            return view(request, *args, **kwargs)
+        return wrapped
+    return decorator
+
+
+class _ReleaseOnClose:
+    """
+    Streaming content that calls ``release`` once it is exhausted or closed.
+    The response closes it when the server is done with it, even if the client
+    disconnected halfway or the body was never read. While it streams it calls
+    ``renew`` every half ``CONCURRENCY_TIMEOUT``, so a body that takes longer
+    than the lease to send keeps its slot.
+    """
+
+    def __init__(self, content, release, renew):
+        self.content = content
+        self.release = release
+        self.renew = renew
+        self.renewed_at = timezone.now()
+
+    def __iter__(self):
+        renew_every = timedelta(seconds=_setting("CONCURRENCY_TIMEOUT") / 2)
+        for chunk in self.content:
+            now = timezone.now()
+            if self.release is not None and now - self.renewed_at >= renew_every:
+                self.renew()
+                self.renewed_at = now
+            yield chunk
+        self.close()
+
+    def close(self):
+        if self.release is not None:
+            release, self.release = self.release, None
+            release()
+        if hasattr(self.content, "close"):
+            self.content.close()
+
+
+def _claim_slot(scope, limit, token, now):
+    from search.models import ConcurrencySlot
+
+    expires_at = now + timedelta(seconds=_setting("CONCURRENCY_TIMEOUT"))
+    for number in range(limit):
+        claimed = ConcurrencySlot.objects.filter(
+            scope=scope, number=number, expires_at__lte=now
+        ).update(holder=token, expires_at=expires_at)
+        if claimed:
+            return True
+    return False
+
+
+def acquire_slot(scope, limit) -> str | None:
+    """
+    Claim one of the ``limit`` slots of ``scope`` for ``CONCURRENCY_TIMEOUT``
+    seconds. Return the claim's token, or ``None`` if every slot is taken.
+    """
+    from search.models import ConcurrencySlot
+
+    now = timezone.now()
+    token = uuid.uuid4().hex
+    if _claim_slot(scope, limit, token, now):
+        return token
+    # Every slot taken, or not created yet (a new scope, a raised limit).
+    existing = set(ConcurrencySlot.objects.filter(scope=scope).values_list("number", flat=True))
+    missing = [number for number in range(limit) if number not in existing]
+    if not missing:
+        return None
+    ConcurrencySlot.objects.bulk_create(
+        [ConcurrencySlot(scope=scope, number=number, expires_at=now) for number in missing],
+        ignore_conflicts=True,
+    )
+    return token if _claim_slot(scope, limit, token, now) else None
+
+
+def renew_slot(scope, token):
+    """Extend the claim ``token`` by another ``CONCURRENCY_TIMEOUT`` seconds."""
+    from search.models import ConcurrencySlot
+
+    expires_at = timezone.now() + timedelta(seconds=_setting("CONCURRENCY_TIMEOUT"))
+    ConcurrencySlot.objects.filter(scope=scope, holder=token).update(expires_at=expires_at)
+
+
+def release_slot(scope, token):
+    from search.models import ConcurrencySlot
+
+    # Only our own claim: after a timeout the slot may belong to someone else.
+    ConcurrencySlot.objects.filter(scope=scope, holder=token).update(
+        holder="", expires_at=timezone.now()
+    )
+
+
+def shed_load(scope):
+    """Decorate a view so at most ``CONCURRENCY[scope]`` requests run at once."""
+    def decorator(view):
+        @wraps(view)
+        def wrapped(request, *args, **kwargs):
+            limit = _setting("CONCURRENCY").get(scope)
+            if not (_setting("ENABLED") and limit):
+                return view(request, *args, **kwargs)
+            token = acquire_slot(scope, limit)
+            if token is None:
+                return _retry_response(503, "The server is busy. Please try again shortly.", 1)
+
+            def release():
+                release_slot(scope, token)
+
+            def renew():
+                renew_slot(scope, token)
+
+            streaming = False
+            try:
+                response = view(request, *args, **kwargs)
+                # Render lazy responses while the slot is held, so the cap
+                # covers the template work as well.
+                if hasattr(response, "render") and callable(response.render):
+                    response = response.render()
+                if response.streaming:
+                    # Hold the slot until the body has been sent (e.g. exports).
+                    response.streaming_content = _ReleaseOnClose(response.streaming_content, release, renew)
+                    streaming = True
+                return response
+            finally:
+                if not streaming:
+                    release()
+        return wrapped
+    return decorator
@@ -71,6 +71,8 @@ MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
+    "catalog.anchor_redirects.AnchorRedirectMiddleware",
+    "home.page_cache.PageCacheMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "auditlog.middleware.AuditlogMiddleware",  # Track user for audit logs
@@ -81,6 +83,9 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = "mysite.urls"
 
+# Turns search analytics off for the test suite (see mysite.test_runner).
+TEST_RUNNER = "mysite.test_runner.TestRunner"
+
 TEMPLATES = [
     {
         "BACKEND": "django.template.backends.django.DjangoTemplates",
@@ -220,12 +225,66 @@ WAGTAIL_USER_CUSTOM_FIELDS = []  # Can add custom fields later if needed
 
 # Search
 # https://docs.wagtail.org/en/stable/topics/search/backends.html
+# The database backend picks its implementation from the database vendor: on
+# PostgreSQL it stores weighted tsvector columns behind GIN indexes, on SQLite
+# it uses an FTS5 table. Field weights come from the ``boost`` of each catalog
+# ``search_fields`` entry.
 WAGTAILSEARCH_BACKENDS = {
     "default": {
         "BACKEND": "wagtail.search.backends.database",
     }
 }
 
+if DATABASES["default"]["ENGINE"] == "django.db.backends.postgresql":
+    # Stem English terms in the stored tsvectors ("droughts" matches "drought").
+    # Changing the config requires rebuilding the index: manage.py update_index
+    WAGTAILSEARCH_BACKENDS["default"]["SEARCH_CONFIG"] = "english"
+
+# Free-text matching on the catalog search page: "database" uses the backend
+# above; "memory" uses the in-process BM25 index in search.engine, built
+# when each worker loads the app and kept in sync on publish.
+CATALOG_SEARCH_ENGINE = os.environ.get("CATALOG_SEARCH_ENGINE", "database")
+
+# Search analytics (search.analytics): each worker buffers samples in memory and
+# writes them with one bulk insert once FLUSH_SIZE are queued or FLUSH_INTERVAL
+# seconds have passed since the last write.
+SEARCH_ANALYTICS = {
+    "ENABLED": True,
+    "FLUSH_SIZE": 100,
+    "FLUSH_INTERVAL": 30,
+}
+
+# Rate limiting and load shedding (mysite.ratelimit). Each client IP gets a
+# token bucket per scope, refilled at RATE tokens per second up to BURST;
+# CONCURRENCY caps simultaneous searches across all workers so crawlers can't
+# occupy every gunicorn worker; its slots are database rows, held at most
+# CONCURRENCY_TIMEOUT seconds. TRUSTED_PROXIES is the number of reverse
+# proxies in front of gunicorn that append to X-Forwarded-For.
+RATE_LIMIT = {
+    "ENABLED": True,
+    "TRUSTED_PROXIES": int(os.environ.get("TRUSTED_PROXIES", 1)),
+    "BUCKETS": {
+        "search": {"RATE": 1.0, "BURST": 30},
+        "forms": {"RATE": 1 / 60, "BURST": 5},
+    },
+    "CONCURRENCY": {"search": 3},
+    "CONCURRENCY_TIMEOUT": 120,
+}
+
+# Identifies the deployed code (restart_gunicorn.sh sets it to the git commit).
+# Part of every page ETag (catalog.conditional), so a deploy that changes
+# templates or rendering isn't answered with 304s for the old HTML.
+SITE_VERSION = os.environ.get("SITE_VERSION", "")
+
+# Full-page cache of Wagtail pages for anonymous visitors (home.page_cache).
+# Publishing, unpublishing or moving a page purges it and the pages that show
+# or link to it; TIMEOUT (seconds) bounds anything a purge can't see, like
+# snippets.
+PAGE_CACHE = {
+    "ENABLED": True,
+    "TIMEOUT": 60 * 10,
+}
+
 # Base URL to use when referring to full URLs within the Wagtail admin backend -
 # e.g. in notification emails. Don't include '/admin' or a trailing slash
 WAGTAILADMIN_BASE_URL = "http://example.com"
@@ -35,6 +35,32 @@ EMAIL_HOST_PASSWORD = os.environ.get("EMAIL_HOST_PASSWORD", "")
 DEFAULT_FROM_EMAIL = os.environ.get("DEFAULT_FROM_EMAIL", EMAIL_HOST_USER)
 SERVER_EMAIL = DEFAULT_FROM_EMAIL
 
+# Shared cache. Cached search results, pages and fragments are invalidated
+# through version counters kept in the cache, so every gunicorn worker must see
+# the same cache (the default local-memory cache is per process). Use Redis
+# (REDIS_URL, e.g. redis://127.0.0.1:6379/1): its counters are atomic and it
+# evicts by expiry rather than at random. Without it, fall back to a file cache
+# sized for the catalog: past MAX_ENTRIES every write lists the directory and
+# deletes a random 1/CULL_FREQUENCY of the entries, version counters included.
+if os.environ.get("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.environ["REDIS_URL"],
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": os.environ.get("DJANGO_CACHE_DIR", os.path.join(BASE_DIR, "cache")),
+            "OPTIONS": {
+                "MAX_ENTRIES": int(os.environ.get("DJANGO_CACHE_MAX_ENTRIES", 50000)),
+                "CULL_FREQUENCY": 10,
+            },
+        }
+    }
+
 # ManifestStaticFilesStorage is recommended in production, to prevent
 # outdated JavaScript / CSS assets being served from cache
 STORAGES["staticfiles"]["BACKEND"] = "django.contrib.staticfiles.storage.ManifestStaticFilesStorage"
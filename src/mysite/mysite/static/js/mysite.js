@@ -0,0 +1,58 @@
+// Search-as-you-type for the navbar search box: fetches title suggestions
+// (served from an in-memory index, see search/suggest.py) and lists them
+// under the input as links to the matching pages.
+(function () {
+    var input = document.querySelector('input[data-suggest-url]');
+    if (!input) return;
+    var list = input.parentNode.querySelector('[data-suggestions]');
+    var timer = null;
+    var latest = '';
+
+    function hide() {
+        list.classList.add('hidden');
+        list.innerHTML = '';
+    }
+
+    function show(suggestions) {
+        list.innerHTML = '';
+        suggestions.forEach(function (item) {
+            var link = document.createElement('a');
+            link.href = item.url;
+            link.className = 'block px-4 py-2 text-sm text-gray-700 hover:bg-gray-50';
+            link.textContent = item.title;
+            if (item.indicator) {
+                var context = document.createElement('span');
+                context.className = 'block text-xs text-gray-400';
+                context.textContent = item.indicator;
+                link.appendChild(context);
+            }
+            list.appendChild(link);
+        });
+        list.classList.toggle('hidden', suggestions.length === 0);
+    }
+
+    input.addEventListener('input', function () {
+        clearTimeout(timer);
+        var query = input.value.trim();
+        latest = query;
+        if (query.length < 2) {
+            hide();
+            return;
+        }
+        timer = setTimeout(function () {
+            fetch(input.dataset.suggestUrl + '?q=' + encodeURIComponent(query))
+                .then(function (response) { return response.json(); })
+                .then(function (data) {
+                    if (query === latest) show(data.suggestions);
+                })
+                .catch(hide);
+        }, 120);
+    });
+
+    input.addEventListener('keydown', function (event) {
+        if (event.key === 'Escape') hide();
+    });
+    document.addEventListener('click', function (event) {
+        if (!input.parentNode.contains(event.target)) hide();
+    });
+})();
@@ -0,0 +1,26 @@
+"""Test runner for ``manage.py test`` (the ``TEST_RUNNER`` setting)."""
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class TestRunner(DiscoverRunner):
+    """
+    Runs the suite with search analytics off, so searches made by tests aren't
+    buffered and then flushed into the real database when the process exits.
+    Tests of the analytics themselves turn it back on with ``override_settings``.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.analytics_off = override_settings(
+            SEARCH_ANALYTICS={**getattr(settings, "SEARCH_ANALYTICS", {}), "ENABLED": False}
+        )
+        self.analytics_off.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        from search import analytics
+
+        analytics.buffer.clear()
+        self.analytics_off.disable()
+        super().teardown_test_environment(**kwargs)
@@ -15,6 +15,8 @@ urlpatterns = [
     path("django-admin/", admin.site.urls),
     path("documents/", include(wagtaildocs_urls)),
     path("search/", search_views.search, name="search"),
+    path("search/options/", search_views.filter_options, name="search_options"),
+    path("search/suggest/", search_views.suggest, name="search_suggest"),
     # Static pages below are now managed by Wagtail - create them in the admin
     # path("wiki-instructions/", TemplateView.as_view(template_name="wiki_instructions.html"), name="wiki_instructions"),
     # path("faq/", TemplateView.as_view(template_name="faq.html"), name="faq"),
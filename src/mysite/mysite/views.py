@@ -7,6 +7,7 @@ from django.core.mail import send_mail
 from django.conf import settings
 
 from .forms import BecomeEditorForm, FeedbackForm
+from .ratelimit import rate_limit
 
 
 def _load_email_config():
@@ -72,6 +73,7 @@ def _send_email_with_smtp(subject, message, recipient_list):
     email.send(fail_silently=False)
 
 
+@rate_limit("forms", methods=("POST",))
 def become_editor_view(request):
     """Handle the 'Become an Editor' application form."""
     if request.method == 'POST':
@@ -135,6 +137,7 @@ The TrackAdapt Wiki Team
     return render(request, 'become_editor.html', {'form': form})
 
 
+@rate_limit("forms", methods=("POST",))
 def feedback_view(request):
     """Handle the feedback and corrections form."""
     if request.method == 'POST':
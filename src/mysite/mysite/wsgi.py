@@ -14,3 +14,16 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "mysite.settings.dev")
 
 application = get_wsgi_application()
+
+# Build the in-memory search index when the app loads: once in the gunicorn
+# master with --preload, otherwise in each worker.
+from django.conf import settings  # noqa: E402
+
+if settings.CATALOG_SEARCH_ENGINE == "memory":
+    from django.db import connections
+
+    from search.engine import get_index
+
+    get_index()
+    # Workers must not inherit the master's database connection.
+    connections.close_all()
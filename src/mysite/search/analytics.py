@@ -0,0 +1,116 @@
+"""Per-worker buffer of search analytics samples, written in bulk.
+
+``search.views.search`` records one sample per request (normalized query and
+filters, result counts, time spent resolving the result set and total time).
+Samples are appended to an in-memory list; nothing is written while the request
+is being served. Once ``FLUSH_SIZE`` samples are queued, or ``FLUSH_INTERVAL``
+seconds have passed since the last write, the buffer is written with a single
+``bulk_create`` when the request finishes (after the response has been sent),
+and whatever is left is written when the worker exits.
+
+Settings (``SEARCH_ANALYTICS``): ``ENABLED``, ``FLUSH_SIZE``, ``FLUSH_INTERVAL``.
+"""
+from __future__ import annotations
+
+import atexit
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.signals import request_finished
+from django.db import DatabaseError
+from django.dispatch import receiver
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {"ENABLED": True, "FLUSH_SIZE": 100, "FLUSH_INTERVAL": 30}
+
+
+def _setting(name):
+    return getattr(settings, "SEARCH_ANALYTICS", {}).get(name, DEFAULTS[name])
+
+
+class SampleBuffer:
+    def __init__(self):
+        self.samples = []
+        self.lock = threading.Lock()
+        self.last_flush = time.monotonic()
+
+    def add(self, sample: dict):
+        with self.lock:
+            self.samples.append(sample)
+
+    def due(self) -> bool:
+        return bool(self.samples) and (
+            len(self.samples) >= _setting("FLUSH_SIZE")
+            or time.monotonic() - self.last_flush >= _setting("FLUSH_INTERVAL")
+        )
+
+    def clear(self):
+        """Drop every queued sample unwritten."""
+        with self.lock:
+            self.samples = []
+
+    def flush(self) -> int:
+        """Write every queued sample with one bulk insert; return how many."""
+        from .models import SearchQueryLog
+
+        with self.lock:
+            samples, self.samples = self.samples, []
+            self.last_flush = time.monotonic()
+        if not samples:
+            return 0
+        try:
+            SearchQueryLog.objects.bulk_create(SearchQueryLog(**sample) for sample in samples)
+        except DatabaseError:
+            # Analytics must never break search; drop the batch.
+            logger.exception("Could not write %d search analytics samples", len(samples))
+            return 0
+        return len(samples)
+
+
+buffer = SampleBuffer()
+
+
+def record(criteria, results, page, backend_ms, total_ms):
+    """Queue one search sample (``criteria`` as from ``search.results.normalize_criteria``)."""
+    if not _setting("ENABLED"):
+        return
+    from .models import SearchQueryLog
+
+    query, dimension_key, indicator_type_key, indicator = criteria
+    texts = {
+        "query": query,
+        "dimension": dimension_key,
+        "indicator_type": indicator_type_key,
+        "indicator": indicator,
+        "corrected_query": results.get("corrected_query", ""),
+    }
+    # Filters come straight from the URL: one oversized value would fail the
+    # bulk insert (on PostgreSQL) and lose the whole batch.
+    buffer.add({
+        **{
+            name: value[:SearchQueryLog._meta.get_field(name).max_length]
+            for name, value in texts.items()
+        },
+        "page": page,
+        "indicator_count": len(results["indicators"]),
+        "metric_count": sum(len(ids) for ids in results["metrics"].values()),
+        "backend_ms": round(backend_ms, 3),
+        "total_ms": round(total_ms, 3),
+    })
+
+
+@receiver(request_finished)
+def flush_when_due(sender, **kwargs):
+    if buffer.due():
+        buffer.flush()
+
+
+@atexit.register
+def _flush_on_exit():
+    try:
+        buffer.flush()
+    except Exception:  # noqa: BLE001 - interpreter shutdown, nothing to report to
+        pass
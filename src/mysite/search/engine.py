@@ -0,0 +1,284 @@
+"""In-process BM25 full-text engine for the catalog search page.
+
+An alternative to the database search backend, selected with the
+``CATALOG_SEARCH_ENGINE = "memory"`` setting. Live Indicator, Metric, Method
+and SOP pages are tokenized once into an inverted index held in typed arrays:
+
+* ``terms`` maps each term to a ``(start, count)`` span of the packed
+  postings, ``docs`` (document slots) and ``freqs`` (field-weighted term
+  frequencies), sorted by term;
+* per-document columns (``page_ids``, ``lengths``) are addressed by slot.
+
+Field weights are the ``boost`` of each model's ``search_fields`` entry, the
+same weights the database backend uses, so both engines rank alike. Queries use
+AND semantics like the database backends and are scored with BM25.
+
+Arrays hold their items in one buffer rather than as separate Python objects,
+which keeps the index compact. If gunicorn runs with ``--preload`` (see
+``mysite.wsgi``) the index is built once before the workers fork; the array
+buffers then tend to stay shared, but the ``terms`` and ``slots`` dicts are
+ordinary Python objects whose pages get copied into a worker as it reads them.
+
+Publishing or unpublishing bumps the catalog version (``catalog.cache_utils``).
+A worker that notices a new version catches up incrementally: removed pages are
+tombstoned, and pages published since the last sync are re-indexed into a small
+delta of postings that is folded into the packed arrays once it grows.
+"""
+from __future__ import annotations
+
+import math
+import re
+import threading
+from array import array
+from collections import defaultdict
+
+from django.contrib.contenttypes.models import ContentType
+
+from wagtail.models import Page
+
+from catalog.cache_utils import get_version
+from catalog.models import IndicatorPage, MethodPage, MetricPage, SOPPage
+from catalog.richtext_utils import plain_text
+
+CATALOG_MODELS = (IndicatorPage, MetricPage, MethodPage, SOPPage)
+
+# BM25 term-frequency saturation and length normalization.
+K1 = 1.2
+B = 0.75
+
+# Fold the delta into the packed arrays once it covers this many documents.
+PACK_THRESHOLD = 64
+
+_TOKEN_RE = re.compile(r"\w+")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from in into is it its of on or that the to with".split()
+)
+
+
+def tokenize(text: str) -> list[str]:
+    """Split text into lowercased terms, dropping stopwords."""
+    return [term for term in _TOKEN_RE.findall(text.casefold()) if term not in STOPWORDS]
+
+
+def _field_text(value) -> str:
+    # RichTextField values come back from SearchField.get_value as a list of
+    # already-stripped strings.
+    if isinstance(value, (list, tuple)):
+        value = " ".join(str(item) for item in value)
+    return plain_text(value)
+
+
+def _weighted_fields(model):
+    return [
+        (field, field.boost or 1.0) for field in model.get_searchable_search_fields()
+    ]
+
+
+class CatalogIndex:
+    """Array-backed inverted index over live catalog pages, scored with BM25."""
+
+    def __init__(self):
+        self.page_ids = array("q")
+        self.lengths = array("d")
+        self.slots: dict[int, int] = {}
+        self.terms: dict[str, tuple[int, int]] = {}
+        self.docs = array("l")
+        self.freqs = array("d")
+        # Postings of documents (re)indexed since the last pack: term -> {slot: freq}.
+        self.delta: dict[str, dict[int, float]] = defaultdict(dict)
+        self.delta_docs = 0
+        self.total_length = 0.0
+        # Latest last_published_at indexed; pages published from then on are re-read.
+        self.watermark = None
+        self.version = None
+
+    @classmethod
+    def build(cls):
+        index = cls()
+        index.refresh()
+        index.pack()
+        return index
+
+    def __len__(self):
+        return len(self.slots)
+
+    def add(self, page):
+        """Index (or re-index) a specific page instance."""
+        self.remove(page.pk)
+        counts = defaultdict(float)
+        for field, weight in _weighted_fields(type(page)):
+            for term in tokenize(_field_text(field.get_value(page))):
+                counts[term] += weight
+
+        slot = len(self.page_ids)
+        length = sum(counts.values())
+        self.page_ids.append(page.pk)
+        self.lengths.append(length)
+        self.slots[page.pk] = slot
+        self.total_length += length
+        for term, freq in counts.items():
+            self.delta[term][slot] = freq
+        self.delta_docs += 1
+
+        if self.watermark is None or (
+            page.last_published_at and page.last_published_at > self.watermark
+        ):
+            self.watermark = page.last_published_at
+
+    def remove(self, page_id):
+        """Tombstone a page; its postings are skipped until the next pack."""
+        slot = self.slots.pop(page_id, None)
+        if slot is not None:
+            self.total_length -= self.lengths[slot]
+            self.lengths[slot] = -1.0
+
+    def refresh(self):
+        """Catch up with pages published or unpublished since the last sync."""
+        content_types = ContentType.objects.get_for_models(*CATALOG_MODELS).values()
+        live_ids = set(
+            Page.objects.live()
+            .filter(content_type__in=content_types)
+            .values_list("pk", flat=True)
+        )
+        for page_id in set(self.slots) - live_ids:
+            self.remove(page_id)
+
+        for model in CATALOG_MODELS:
+            pages = model.objects.live()
+            if self.watermark is not None:
+                # >= so pages sharing the watermark's timestamp aren't missed;
+                # re-indexing an unchanged page is harmless.
+                pages = pages.filter(last_published_at__gte=self.watermark)
+            for page in pages.iterator():
+                self.add(page)
+
+        if self.delta_docs >= PACK_THRESHOLD:
+            self.pack()
+
+    def pack(self):
+        """Fold the delta into the packed arrays, dropping tombstoned documents."""
+        postings = defaultdict(list)
+        for term, (start, count) in self.terms.items():
+            for i in range(start, start + count):
+                postings[term].append((self.docs[i], self.freqs[i]))
+        for term, entries in self.delta.items():
+            postings[term].extend(entries.items())
+
+        # Renumber the surviving documents into contiguous slots.
+        renumbered = {}
+        page_ids, lengths = array("q"), array("d")
+        for slot, page_id in enumerate(self.page_ids):
+            if self.lengths[slot] >= 0:
+                renumbered[slot] = len(page_ids)
+                page_ids.append(page_id)
+                lengths.append(self.lengths[slot])
+
+        terms, docs, freqs = {}, array("l"), array("d")
+        for term in sorted(postings):
+            entries = sorted(
+                (renumbered[slot], freq)
+                for slot, freq in postings[term]
+                if slot in renumbered
+            )
+            if entries:
+                terms[term] = (len(docs), len(entries))
+                for slot, freq in entries:
+                    docs.append(slot)
+                    freqs.append(freq)
+
+        self.page_ids, self.lengths = page_ids, lengths
+        self.slots = {page_id: slot for slot, page_id in enumerate(page_ids)}
+        self.terms, self.docs, self.freqs = terms, docs, freqs
+        self.delta = defaultdict(dict)
+        self.delta_docs = 0
+
+    def vocabulary(self) -> dict[str, int]:
+        """Document frequency of every indexed term (for spelling correction)."""
+        frequencies = {
+            term: sum(1 for i in range(start, start + count) if self.lengths[self.docs[i]] >= 0)
+            for term, (start, count) in self.terms.items()
+        }
+        for term, entries in self.delta.items():
+            live = sum(1 for slot in entries if self.lengths[slot] >= 0)
+            frequencies[term] = frequencies.get(term, 0) + live
+        return {term: df for term, df in frequencies.items() if df}
+
+    def _postings(self, term):
+        """Live ``(slot, freq)`` postings of ``term``, packed and delta."""
+        found = []
+        span = self.terms.get(term)
+        if span:
+            start, count = span
+            for i in range(start, start + count):
+                slot = self.docs[i]
+                if self.lengths[slot] >= 0:
+                    found.append((slot, self.freqs[i]))
+        for slot, freq in self.delta.get(term, {}).items():
+            if self.lengths[slot] >= 0:
+                found.append((slot, freq))
+        return found
+
+    def search(self, query: str) -> list[tuple[int, float]]:
+        """Return ``(page_id, score)`` for pages containing every query term, best first."""
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms or not self.slots:
+            return []
+
+        n = len(self.slots)
+        avg_length = self.total_length / n or 1.0
+        scores = None
+        for term in terms:
+            postings = self._postings(term)
+            if not postings:
+                return []
+            idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            term_scores = {
+                slot: idf * freq * (K1 + 1)
+                / (freq + K1 * (1 - B + B * self.lengths[slot] / avg_length))
+                for slot, freq in postings
+            }
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {
+                    slot: score + term_scores[slot]
+                    for slot, score in scores.items()
+                    if slot in term_scores
+                }
+                if not scores:
+                    return []
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return [(self.page_ids[slot], score) for slot, score in ranked]
+
+
+_index: CatalogIndex | None = None
+_lock = threading.Lock()
+
+
+def get_index() -> CatalogIndex:
+    """Return the process-wide index, brought up to date with the catalog version."""
+    global _index
+    version = get_version()
+    if _index is None or _index.version != version:
+        with _lock:
+            if _index is None:
+                _index = CatalogIndex.build()
+            elif _index.version != version:
+                _index.refresh()
+            # Set after syncing: a publish during the refresh bumps the version
+            # again, so the next call syncs once more.
+            _index.version = version
+    return _index
+
+
+def search_ids(query: str) -> list[int]:
+    """IDs of live catalog pages matching ``query``, best match first."""
+    return [page_id for page_id, _ in get_index().search(query)]
+
+
+def reset():
+    """Drop the process-wide index (it is rebuilt on next use)."""
+    global _index
+    with _lock:
+        _index = None
@@ -0,0 +1,130 @@
+"""Streaming CSV / NDJSON export of a search result set.
+
+``search.views.search`` hands the same cached result set it paginates (see
+``search.results``) to ``export_response`` when ``?export=csv`` or
+``?export=ndjson`` is given. Indicators and their metrics are loaded a chunk at
+a time and written out as they are produced, so memory stays flat however much
+of the catalog is exported.
+"""
+from __future__ import annotations
+
+import csv
+import json
+
+from django.http import StreamingHttpResponse
+
+from catalog.models import IndicatorPage, MetricPage
+from catalog.richtext_utils import plain_text
+
+EXPORT_FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+# Indicators loaded per query (with all of their matching metrics).
+EXPORT_CHUNK_SIZE = 200
+
+CSV_HEADER = [
+    "indicator_id",
+    "indicator_title",
+    "dimension",
+    "indicator_type",
+    "indicator_url",
+    "metric_id",
+    "metric_title",
+    "metric_url",
+    "metric_description",
+]
+
+
+# Leading characters that make spreadsheet applications evaluate a cell as a
+# formula (OWASP "CSV injection"); such cells are prefixed with a quote.
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def _csv_row(values):
+    return [
+        "'" + value if isinstance(value, str) and value.startswith(FORMULA_PREFIXES) else value
+        for value in values
+    ]
+
+
+class _Echo:
+    """File-like object whose ``write`` returns the value, for ``csv.writer``."""
+
+    def write(self, value):
+        return value
+
+
+def _indicator_chunks(results):
+    """Yield ``(indicator, metrics)`` pairs in display order, one chunk at a time."""
+    indicator_ids = results["indicators"]
+    for start in range(0, len(indicator_ids), EXPORT_CHUNK_SIZE):
+        chunk = indicator_ids[start:start + EXPORT_CHUNK_SIZE]
+        indicators = IndicatorPage.objects.in_bulk(chunk)
+        metrics = MetricPage.objects.in_bulk(
+            [pk for ind_id in chunk for pk in results["metrics"].get(ind_id, [])]
+        )
+        for ind_id in chunk:
+            indicator = indicators.get(ind_id)
+            if indicator is None:
+                continue
+            yield indicator, [
+                metrics[pk] for pk in results["metrics"].get(ind_id, []) if pk in metrics
+            ]
+
+
+def _url(page, request):
+    return request.build_absolute_uri(page.get_url(request=request))
+
+
+def _csv_lines(results, request):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(CSV_HEADER)
+    for indicator, metrics in _indicator_chunks(results):
+        indicator_columns = [
+            indicator.pk,
+            indicator.title,
+            indicator.dimension.strip(),
+            indicator.indicator_type.strip(),
+            _url(indicator, request),
+        ]
+        if not metrics:
+            yield writer.writerow(_csv_row(indicator_columns + ["", "", "", ""]))
+        for metric in metrics:
+            yield writer.writerow(_csv_row(
+                indicator_columns
+                + [metric.pk, metric.title, _url(metric, request), plain_text(metric.description)]
+            ))
+
+
+def _ndjson_lines(results, request):
+    for indicator, metrics in _indicator_chunks(results):
+        record = {
+            "id": indicator.pk,
+            "title": indicator.title,
+            "dimension": indicator.dimension.strip(),
+            "indicator_type": indicator.indicator_type.strip(),
+            "url": _url(indicator, request),
+            "description": plain_text(indicator.description),
+            "metrics": [
+                {
+                    "id": metric.pk,
+                    "title": metric.title,
+                    "url": _url(metric, request),
+                    "description": plain_text(metric.description),
+                }
+                for metric in metrics
+            ],
+        }
+        yield json.dumps(record, ensure_ascii=False) + "\n"
+
+
+def export_response(request, results, export_format):
+    """Stream ``results`` (see ``search.results.get_results``) as CSV or NDJSON."""
+    lines = _csv_lines if export_format == "csv" else _ndjson_lines
+    response = StreamingHttpResponse(
+        lines(results, request), content_type=EXPORT_FORMATS[export_format]
+    )
+    response["Content-Disposition"] = f'attachment; filename="catalog-search.{export_format}"'
+    return response
@@ -0,0 +1,119 @@
+"""Typo tolerance for catalog search: "did you mean" query corrections.
+
+When a free-text query matches nothing, ``correct_query`` replaces each word
+with the closest known word by trigram similarity (the measure PostgreSQL's
+``pg_trgm`` uses: shared three-letter sequences of the space-padded word over
+all distinct ones), and ``search.results`` re-runs the search with the
+correction.
+
+The known words are those of the searched fields of live catalog pages: with
+the in-memory engine, the vocabulary of its index; otherwise the words of each
+page's title and ``search_text`` (its searchable rich-text fields as plain
+text). Either way they are looked up in an in-process inverted trigram index,
+rebuilt after a catalog change, so no database extension is needed.
+"""
+from __future__ import annotations
+
+import threading
+from collections import Counter, defaultdict
+
+from django.conf import settings
+
+from catalog.cache_utils import get_version
+
+from . import engine
+
+# Minimum similarity for a correction (pg_trgm's default threshold is 0.3).
+SIMILARITY_THRESHOLD = 0.35
+# Words this short have too few trigrams to correct reliably.
+MIN_WORD_LENGTH = 4
+
+
+def trigrams(word: str) -> set[str]:
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def similarity(a: str, b: str) -> float:
+    a_grams, b_grams = trigrams(a), trigrams(b)
+    return len(a_grams & b_grams) / len(a_grams | b_grams)
+
+
+class TrigramIndex:
+    """Closest-word lookup over a vocabulary, through an inverted trigram index."""
+
+    def __init__(self, frequencies: dict[str, int]):
+        self.words = list(frequencies)
+        self.frequencies = [frequencies[word] for word in self.words]
+        self.known = set(self.words)
+        self.sizes = []
+        self.postings = defaultdict(list)
+        for position, word in enumerate(self.words):
+            grams = trigrams(word)
+            self.sizes.append(len(grams))
+            for gram in grams:
+                self.postings[gram].append(position)
+        self.version = None
+
+    def closest(self, word: str) -> str | None:
+        if word in self.known:
+            return word
+        grams = trigrams(word)
+        shared = Counter(
+            position for gram in grams for position in self.postings.get(gram, ())
+        )
+        best, best_rank = None, None
+        for position, count in shared.items():
+            score = count / (len(grams) + self.sizes[position] - count)
+            rank = (score, self.frequencies[position])
+            if score >= SIMILARITY_THRESHOLD and (best_rank is None or rank > best_rank):
+                best, best_rank = self.words[position], rank
+        return best
+
+
+def _catalog_words():
+    """Document frequency of the words of live catalog pages' searched fields."""
+    frequencies = Counter()
+    for model in engine.CATALOG_MODELS:
+        for title, text in model.objects.live().values_list("title", "search_text").iterator():
+            frequencies.update(set(engine.tokenize(title)) | set(engine.tokenize(text)))
+    return frequencies
+
+
+_trigram_index: TrigramIndex | None = None
+_lock = threading.Lock()
+
+
+def _get_trigram_index() -> TrigramIndex:
+    """Process-wide trigram index over the vocabulary, rebuilt after a catalog change."""
+    global _trigram_index
+    memory = settings.CATALOG_SEARCH_ENGINE == "memory"
+    version = (memory, get_version())
+    if _trigram_index is None or _trigram_index.version != version:
+        with _lock:
+            if _trigram_index is None or _trigram_index.version != version:
+                vocabulary = engine.get_index().vocabulary() if memory else _catalog_words()
+                index = TrigramIndex(vocabulary)
+                index.version = version
+                _trigram_index = index
+    return _trigram_index
+
+
+def correct_query(query: str) -> str | None:
+    """Return ``query`` with misspelt words corrected, or None if nothing changed."""
+    closest = _get_trigram_index().closest
+    words = query.split()
+    corrected = []
+    for word in words:
+        replacement = None
+        if len(word) >= MIN_WORD_LENGTH and word.isalpha():
+            replacement = closest(word)
+        corrected.append(replacement or word)
+    return " ".join(corrected) if corrected != words else None
+
+
+def reset():
+    """Drop the process-wide trigram index (it is rebuilt on next use)."""
+    global _trigram_index
+    with _lock:
+        _trigram_index = None
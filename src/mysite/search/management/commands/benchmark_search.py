@@ -0,0 +1,151 @@
+"""Benchmark the catalog search page against the current corpus.
+
+    python manage.py benchmark_search
+    python manage.py benchmark_search --repeat 50 --engine database --page 1 --page 3
+    python manage.py benchmark_search --query drought --output reports/search.json
+
+Each scenario (a free-text query and/or filters) is requested through
+``search.views.search`` for every engine (``CATALOG_SEARCH_ENGINE``) and page
+number, both with the result cache bypassed ("cold": search backend, filter
+queries and rendering) and warm. For each run the report records latency
+percentiles, the number of SQL queries and the hit count. ``--output`` writes
+the report as JSON (stable keys, sorted) so runs can be diffed between
+releases; generate a catalog of a given size first with ``generate_catalog``.
+"""
+import inspect
+import json
+import statistics
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from wagtail.search.backends import get_search_backend
+
+from catalog.models import IndicatorPage, MethodPage, MetricPage, SOPPage
+from search.views import search
+
+DEFAULT_QUERIES = ["drought", "water access", "crop yield", "resilience index"]
+
+# Representative filter combinations; each free-text query adds its own.
+FILTER_SCENARIOS = {
+    "all": {},
+    "dimension": {"dimension": "Resilience"},
+    "dimension+type": {"dimension": "Resilience", "indicator_type": "Outcome"},
+}
+
+ENGINES = ["database", "memory"]
+PERCENTILES = [50, 90, 95, 99]
+
+NO_CACHE = {"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}}
+NO_ANALYTICS = {"ENABLED": False}
+
+
+def _percentile(sorted_timings, pct):
+    index = min(len(sorted_timings) - 1, round(pct / 100 * (len(sorted_timings) - 1)))
+    return sorted_timings[index]
+
+
+class Command(BaseCommand):
+    help = "Measure catalog search latency and query counts, optionally writing a JSON report."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--query", action="append", dest="queries", help="Query to time (repeatable).")
+        parser.add_argument("--engine", action="append", dest="engines", choices=ENGINES,
+                            help="Search engine to time (repeatable; default: all).")
+        parser.add_argument("--page", action="append", dest="pages", type=int,
+                            help="Result page to request (repeatable; default: 1 and 2).")
+        parser.add_argument("--repeat", type=int, default=20, help="Timed runs per scenario.")
+        parser.add_argument("--output", help="Write the JSON report to this path.")
+
+    def handle(self, *args, **options):
+        queries = options["queries"] or DEFAULT_QUERIES
+        engines = options["engines"] or ENGINES
+        pages = options["pages"] or [1, 2]
+        repeat = max(1, options["repeat"])
+        self.factory = RequestFactory()
+
+        scenarios = dict(FILTER_SCENARIOS)
+        for query in queries:
+            scenarios[f"query:{query}"] = {"query": query}
+            scenarios[f"query:{query}+dimension"] = {"query": query, "dimension": "Resilience"}
+
+        corpus = {
+            "indicators": IndicatorPage.objects.live().count(),
+            "metrics": MetricPage.objects.live().count(),
+            "methods": MethodPage.objects.live().count(),
+            "sops": SOPPage.objects.live().count(),
+        }
+        report = {
+            "generated_at": timezone.now().isoformat(),
+            "database": connection.vendor,
+            "search_backend": type(get_search_backend()).__name__,
+            "corpus": corpus,
+            "repeat": repeat,
+            "runs": [],
+        }
+        self.stdout.write(
+            f"database={report['database']} backend={report['search_backend']} "
+            + " ".join(f"{name}={count}" for name, count in corpus.items())
+        )
+
+        for engine in engines:
+            # Benchmark requests are not searches: keep them out of SearchQueryLog.
+            with override_settings(CATALOG_SEARCH_ENGINE=engine, SEARCH_ANALYTICS=NO_ANALYTICS):
+                for name, params in scenarios.items():
+                    for page in pages:
+                        for cached in (False, True):
+                            run = self.measure({**params, "page": page}, repeat, cached)
+                            run.update({"engine": engine, "scenario": name, "page": page,
+                                        "cache": "warm" if cached else "cold"})
+                            report["runs"].append(run)
+                            self.stdout.write(
+                                f"{engine:8} {name:36} page={page:<3d} {run['cache']:4} "
+                                f"hits={run['hits']:5d} queries={run['queries']:3d} "
+                                f"p50={run['latency_ms']['p50']:8.2f}ms "
+                                f"p95={run['latency_ms']['p95']:8.2f}ms"
+                            )
+
+        if options["output"]:
+            with open(options["output"], "w") as fh:
+                json.dump(report, fh, indent=2, sort_keys=True)
+                fh.write("\n")
+            self.stdout.write(self.style.SUCCESS(f"Report written to {options['output']}"))
+
+    def request(self, params):
+        request = self.factory.get("/search/", params)
+        request.user = AnonymousUser()
+        # The view itself, without the rate limiter and load shedding.
+        response = inspect.unwrap(search)(request)
+        response.render()
+        return response
+
+    def measure(self, params, repeat, cached):
+        if cached:
+            caches = override_settings()
+        else:
+            # A dummy cache makes every run recompute the result set and options.
+            caches = override_settings(CACHES=NO_CACHE)
+        with caches:
+            response = self.request(params)  # warm up connections (and the cache)
+            with CaptureQueriesContext(connection) as queries:
+                self.request(params)
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                self.request(params)
+                timings.append((time.perf_counter() - start) * 1000)
+
+        timings.sort()
+        latency = {f"p{pct}": round(_percentile(timings, pct), 3) for pct in PERCENTILES}
+        latency["mean"] = round(statistics.fmean(timings), 3)
+        latency["max"] = round(timings[-1], 3)
+        return {
+            "hits": response.context_data["indicator_count"],
+            "queries": len(queries),
+            "latency_ms": latency,
+        }
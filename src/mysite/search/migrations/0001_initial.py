@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:52
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchQueryLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('query', models.CharField(blank=True, db_index=True, max_length=255)),
+                ('dimension', models.CharField(blank=True, max_length=150)),
+                ('indicator_type', models.CharField(blank=True, max_length=150)),
+                ('indicator', models.CharField(blank=True, max_length=20)),
+                ('corrected_query', models.CharField(blank=True, max_length=255)),
+                ('page', models.PositiveIntegerField(default=1)),
+                ('indicator_count', models.PositiveIntegerField(default=0)),
+                ('metric_count', models.PositiveIntegerField(default=0)),
+                ('backend_ms', models.FloatField()),
+                ('total_ms', models.FloatField()),
+                ('created_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+            ],
+            options={
+                'ordering': ('-created_at',),
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:39
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('search', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConcurrencySlot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(max_length=50)),
+                ('number', models.PositiveSmallIntegerField()),
+                ('holder', models.CharField(blank=True, max_length=32)),
+                ('expires_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('scope', 'number'), name='search_concurrencyslot_unique')],
+            },
+        ),
+    ]
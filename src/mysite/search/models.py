@@ -0,0 +1,47 @@
+from django.db import models
+from django.utils import timezone
+
+
+class SearchQueryLog(models.Model):
+    """One catalog search request, written in batches by ``search.analytics``."""
+
+    query = models.CharField(max_length=255, blank=True, db_index=True)
+    dimension = models.CharField(max_length=150, blank=True)
+    indicator_type = models.CharField(max_length=150, blank=True)
+    indicator = models.CharField(max_length=20, blank=True)
+    corrected_query = models.CharField(max_length=255, blank=True)
+    page = models.PositiveIntegerField(default=1)
+    indicator_count = models.PositiveIntegerField(default=0)
+    metric_count = models.PositiveIntegerField(default=0)
+    # Resolving the result set (search backend + filter queries, or the result cache).
+    backend_ms = models.FloatField()
+    # The whole request, including template rendering.
+    total_ms = models.FloatField()
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        ordering = ("-created_at",)
+
+    def __str__(self):
+        return f"{self.query or '(no query)'} ({self.total_ms:.0f} ms)"
+
+
+class ConcurrencySlot(models.Model):
+    """
+    One of the ``CONCURRENCY[scope]`` request slots of ``mysite.ratelimit.shed_load``.
+    A slot is free once ``expires_at`` has passed, so one whose holder never
+    released it (a killed worker) is free again after ``CONCURRENCY_TIMEOUT``.
+    """
+
+    scope = models.CharField(max_length=50)
+    number = models.PositiveSmallIntegerField()
+    holder = models.CharField(max_length=32, blank=True)
+    expires_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["scope", "number"], name="search_concurrencyslot_unique"),
+        ]
+
+    def __str__(self):
+        return f"{self.scope} #{self.number}"
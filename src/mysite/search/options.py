@@ -0,0 +1,59 @@
+"""Dropdown options for the search filter bar.
+
+The Purpose / Theme / Indicator option lists only change when an indicator is
+published, unpublished or deleted (deleting a live page unpublishes it first),
+so they are computed once into a shared cache entry keyed by the indicator
+version (see ``catalog.cache_utils``) instead of on every search request.
+"""
+from __future__ import annotations
+
+from django.core.cache import cache
+
+from catalog.cache_utils import INDICATORS, get_version
+from catalog.models import IndicatorPage
+
+OPTIONS_CACHE_TIMEOUT = 24 * 60 * 60
+
+
+def _distinct_options(rows):
+    """
+    Collapse near-duplicate labels (differing only by surrounding whitespace or
+    casing) so the same label doesn't appear twice, keeping the first stored
+    spelling as the label.
+    """
+    seen = {}
+    for key, label in rows:
+        if key:
+            seen.setdefault(key, label.strip())
+    return sorted(seen.values(), key=str.lower)
+
+
+def build_filter_options():
+    """Compute the option lists from live indicators."""
+    live = IndicatorPage.objects.live()
+    return {
+        "dimensions": _distinct_options(
+            live.order_by('pk').values_list('dimension_key', 'dimension')
+        ),
+        "indicator_types": _distinct_options(
+            live.order_by('pk').values_list('indicator_type_key', 'indicator_type')
+        ),
+        "indicators": [
+            {"id": pk, "title": title}
+            for pk, title in live.order_by('title').values_list('pk', 'title')
+        ],
+    }
+
+
+def filter_options_version():
+    return get_version(INDICATORS)
+
+
+def get_filter_options():
+    """Return the cached option lists, rebuilding them after an indicator change."""
+    key = f"search:filter-options:{filter_options_version()}"
+    options = cache.get(key)
+    if options is None:
+        options = build_filter_options()
+        cache.set(key, options, OPTIONS_CACHE_TIMEOUT)
+    return options
@@ -0,0 +1,197 @@
+"""Result sets for the catalog search page.
+
+``get_results`` resolves a normalized (query, filters) tuple to the IDs of the
+indicators to display, in display order, and the IDs of the matching metrics
+grouped under each indicator. The result is cached under the catalog version
+(see ``catalog.cache_utils``), so a repeated search skips the search backend
+and every filter query; publishing or unpublishing a catalog page invalidates
+all cached result sets at once.
+"""
+from __future__ import annotations
+
+import hashlib
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+from wagtail.models import Page
+
+from catalog.cache_utils import get_version
+from catalog.models import IndicatorPage, MethodPage, MetricPage, SOPPage, facet_key
+from catalog.tree_utils import children_of, parents_of
+
+from .fuzzy import correct_query
+
+# Invalidation is driven by the catalog version; the timeout only bounds how
+# long unreachable entries linger.
+RESULTS_CACHE_TIMEOUT = 60 * 60
+
+# Page ids are a 32-bit AutoField; larger values can't match and overflow the
+# database driver.
+MAX_PAGE_ID = 2**31 - 1
+
+
+def normalize_criteria(query=None, dimension=None, indicator_type=None, indicator=None):
+    """Reduce raw request values to the tuple a result set is keyed by."""
+    query = " ".join(query.lower().split()) if query else ""
+    return (query, facet_key(dimension), facet_key(indicator_type), _page_id(indicator))
+
+
+def _page_id(value):
+    """``value`` as a canonical page id string, or ``""`` if it can't be one."""
+    value = str(value).strip() if value else ""
+    if not (value.isascii() and value.isdigit()):
+        return ""
+    pk = int(value)
+    return str(pk) if 0 < pk <= MAX_PAGE_ID else ""
+
+
+def _cache_key(criteria):
+    digest = hashlib.md5(repr(criteria).encode("utf-8")).hexdigest()
+    # The engines rank and match differently: never serve one's results for the other.
+    return f"search:results:{settings.CATALOG_SEARCH_ENGINE}:{get_version()}:{digest}"
+
+
+def _matching_pks(query):
+    """
+    Primary keys of live catalog pages matching ``query``.
+
+    The database backends expose the queryset they run (tsvector @@ tsquery
+    against the stored, GIN-indexed vectors on PostgreSQL; an FTS5 MATCH on
+    SQLite). Using it as a subquery keeps the full-text match and the catalog
+    filters in one SQL statement instead of materializing every hit in Python.
+
+    With ``CATALOG_SEARCH_ENGINE = "memory"`` the match runs against the
+    in-process index in ``search.engine`` instead, without a database query.
+    """
+    if settings.CATALOG_SEARCH_ENGINE == "memory":
+        from . import engine
+
+        return engine.search_ids(query)
+
+    searchable_content_types = [
+        ContentType.objects.get_for_model(model)
+        for model in (IndicatorPage, MetricPage, MethodPage, SOPPage)
+    ]
+    results = Page.objects.live().filter(content_type__in=searchable_content_types).search(query)
+    if hasattr(results, "get_queryset"):
+        return results.get_queryset().values("pk")
+    return [r.pk for r in results]
+
+
+def _facet_counts(rows, dimension_key, indicator_type_key):
+    """
+    Fold ``(dimension_key, indicator_type_key, count)`` rows into per-option
+    counts. Each dropdown counts what selecting that option would show given the
+    other dropdown's current selection.
+    """
+    dimensions = defaultdict(int)
+    indicator_types = defaultdict(int)
+    for dimension, indicator_type, count in rows:
+        if not indicator_type_key or indicator_type == indicator_type_key:
+            dimensions[dimension] += count
+        if not dimension_key or dimension == dimension_key:
+            indicator_types[indicator_type] += count
+    return {"dimensions": dict(dimensions), "indicator_types": dict(indicator_types)}
+
+
+def _compute_results(criteria, correct=True):
+    query, dimension_key, indicator_type_key, indicator = criteria
+
+    # Base querysets for each column. The page always shows both Indicators and
+    # Metrics; the filters below narrow them with criteria that actually exist
+    # in the data (so no option silently filters nothing).
+    indicator_qs = IndicatorPage.objects.live()
+    metric_qs = MetricPage.objects.live()
+
+    # Free-text search applies across both columns. Methods and SOPs are shown
+    # inline on their metric, so a hit on one counts as a hit on the parent
+    # metric (joined by tree path in the same statement).
+    if query:
+        search_pks = _matching_pks(query)
+        indicator_qs = indicator_qs.filter(pk__in=search_pks)
+        child_hits = Page.objects.live().filter(pk__in=search_pks)
+        metric_qs = metric_qs.filter(
+            Q(pk__in=search_pks)
+            | Q(pk__in=parents_of(MetricPage.objects.live(), child_hits).values('pk'))
+        )
+
+    # A specific indicator selection narrows everything to that one indicator
+    # (and the metrics nested beneath it).
+    if indicator:
+        indicator_qs = indicator_qs.filter(pk=indicator)
+        metric_qs = children_of(metric_qs, IndicatorPage.objects.live().filter(pk=indicator))
+
+    # Indicators to display: those matching the indicator-level filters, plus the
+    # parents of any matching metric (so a metric search hit still appears under
+    # its indicator even when the indicator itself didn't match the query).
+    candidates = IndicatorPage.objects.live().filter(
+        Q(pk__in=indicator_qs.values('pk'))
+        | Q(pk__in=parents_of(IndicatorPage.objects.live(), metric_qs).values('pk'))
+    )
+
+    # Per-option counts for the Purpose / Theme dropdowns: one GROUP BY over
+    # the facet keys of every candidate, before the facet filters apply.
+    facets = _facet_counts(
+        candidates.order_by().values_list('dimension_key', 'indicator_type_key').annotate(n=Count('pk')),
+        dimension_key,
+        indicator_type_key,
+    )
+
+    # Dimension / Subdimension are Indicator attributes, matched on the
+    # normalized facet keys stored on each Indicator. Metrics follow their
+    # parent Indicator: they are joined to the displayed indicators below.
+    facet_filters = {}
+    if dimension_key:
+        facet_filters['dimension_key'] = dimension_key
+    if indicator_type_key:
+        facet_filters['indicator_type_key'] = indicator_type_key
+    display_indicators = candidates.filter(**facet_filters).order_by('title', 'pk')
+
+    indicator_ids = []
+    indicator_by_path = {}
+    for pk, path in display_indicators.values_list('pk', 'path'):
+        indicator_ids.append(pk)
+        indicator_by_path[path] = pk
+
+    metrics = defaultdict(list)
+    metric_rows = (
+        children_of(metric_qs, display_indicators)
+        .order_by('path')
+        .values_list('pk', 'path')
+    )
+    for pk, path in metric_rows:
+        metrics[indicator_by_path[path[:-Page.steplen]]].append(pk)
+
+    results = {"indicators": indicator_ids, "metrics": dict(metrics), "facets": facets}
+
+    # Nothing matched: retry with misspelt words corrected ("did you mean").
+    if query and correct and not indicator_ids:
+        corrected = correct_query(query)
+        if corrected:
+            retry = _compute_results((corrected, *criteria[1:]), correct=False)
+            if retry["indicators"]:
+                retry["corrected_query"] = corrected
+                return retry
+    return results
+
+
+def get_results(criteria):
+    """
+    Return the cached result set for normalized ``criteria``.
+
+    The result is a dict with ``indicators`` (indicator IDs in display order),
+    ``metrics`` (indicator ID -> matching metric IDs in tree order) and
+    ``facets`` (per dropdown, facet key -> indicator count), plus
+    ``corrected_query`` when the results are for a spelling correction of a
+    query that matched nothing.
+    """
+    key = _cache_key(criteria)
+    results = cache.get(key)
+    if results is None:
+        results = _compute_results(criteria)
+        cache.set(key, results, RESULTS_CACHE_TIMEOUT)
+    return results
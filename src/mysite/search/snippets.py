@@ -0,0 +1,76 @@
+"""Query-centred result snippets with the matching words highlighted.
+
+Snippets are cut from a page's ``search_text`` (its searchable rich-text fields
+as plain text, extracted on save; see ``catalog.models.BaseWikiPage``), so
+rendering a result never expands or strips rich text. One pass over the words
+finds the matches, a second over the matches picks the window of ``words``
+words holding the most of them, and that window is returned with the matching
+words wrapped in ``<mark>``.
+
+A word matches a query term when it starts with it ("yield" matches "yields"),
+a cheap stand-in for the stemming the database backend applies.
+"""
+from __future__ import annotations
+
+import re
+
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .engine import tokenize
+
+ELLIPSIS = "…"
+_WORD_RE = re.compile(r"(\w+)")
+
+
+def _matches(word, terms):
+    word = word.casefold()
+    return any(word.startswith(term) for term in terms)
+
+
+def _best_window(hits, words):
+    """Start of the ``words``-long window covering the most hits, centred on them."""
+    best_first, best_last, best_count = hits[0], hits[0], 0
+    first = 0
+    for last, position in enumerate(hits):
+        while position - hits[first] >= words:
+            first += 1
+        if last - first + 1 > best_count:
+            best_first, best_last, best_count = hits[first], position, last - first + 1
+    return best_first - (words - (best_last - best_first + 1)) // 2
+
+
+def _mark(token, terms):
+    parts = _WORD_RE.split(token)
+    # Odd positions are the captured words; the rest is punctuation.
+    return "".join(
+        f"<mark>{escape(part)}</mark>" if i % 2 and _matches(part, terms) else escape(part)
+        for i, part in enumerate(parts)
+    )
+
+
+def snippet(text: str, query: str = "", words: int = 30) -> str:
+    """
+    Up to ``words`` words of ``text`` around the densest cluster of ``query``
+    terms, highlighted, as safe HTML. Without a match, the opening words.
+    """
+    tokens = text.split()
+    if not tokens:
+        return ""
+    terms = tokenize(query) if query else []
+    marked = [terms and any(_matches(part, terms) for part in _WORD_RE.findall(token))
+              for token in tokens]
+    hits = [position for position, hit in enumerate(marked) if hit]
+
+    start = _best_window(hits, words) if hits else 0
+    start = max(0, min(start, len(tokens) - words))
+    end = min(len(tokens), start + words)
+
+    body = " ".join(
+        _mark(tokens[i], terms) if marked[i] else escape(tokens[i]) for i in range(start, end)
+    )
+    if start > 0:
+        body = f"{ELLIPSIS} {body}"
+    if end < len(tokens):
+        body = f"{body} {ELLIPSIS}"
+    return mark_safe(body)
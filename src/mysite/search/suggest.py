@@ -0,0 +1,147 @@
+"""Search-as-you-type suggestions from an in-memory prefix index of titles.
+
+Every live catalog page title is indexed under each of its word-suffixes
+("maize yield per hectare", "yield per hectare", ...) in a sorted list, so a
+prefix lookup is a binary search followed by a short scan — no database query.
+Matches at the start of a title rank before matches on a later word.
+
+Each suggestion carries its URL and the title of the indicator it sits under.
+The index is rebuilt (a single query) when the catalog version changes, i.e.
+after any publish or unpublish (see ``catalog.cache_utils``).
+"""
+from __future__ import annotations
+
+import threading
+from bisect import bisect_left
+
+from django.contrib.contenttypes.models import ContentType
+
+from wagtail.models import Page, Site
+
+from catalog.cache_utils import get_version
+from catalog.models import IndicatorPage, MethodPage, MetricPage, SOPPage
+
+SUGGESTION_TYPES = {
+    IndicatorPage: "indicator",
+    MetricPage: "metric",
+    MethodPage: "method",
+    SOPPage: "sop",
+}
+
+DEFAULT_LIMIT = 8
+MAX_LIMIT = 20
+
+
+def normalize(text: str) -> str:
+    return " ".join(text.casefold().split())
+
+
+def _relative_url(url_path, root_paths):
+    for root in root_paths:
+        if url_path.startswith(root.root_path):
+            return url_path[len(root.root_path) - 1:]
+    return None
+
+
+class SuggestionIndex:
+    """Sorted word-suffix keys over live catalog titles."""
+
+    def __init__(self, entries):
+        # entries: (title, url, type, indicator title or None), in title order.
+        self.entries = entries
+        title_keys, word_keys = [], []
+        for position, (title, *_) in enumerate(entries):
+            words = normalize(title).split(" ")
+            title_keys.append((" ".join(words), position))
+            word_keys.extend((" ".join(words[i:]), position) for i in range(1, len(words)))
+        title_keys.sort()
+        word_keys.sort()
+        self.title_keys = title_keys
+        self.word_keys = word_keys
+        self.version = None
+
+    @classmethod
+    def build(cls):
+        types_by_ct = {
+            ContentType.objects.get_for_model(model).pk: kind
+            for model, kind in SUGGESTION_TYPES.items()
+        }
+        indicator_ct = ContentType.objects.get_for_model(IndicatorPage).pk
+        root_paths = Site.get_site_root_paths()
+
+        rows = list(
+            Page.objects.live()
+            .filter(content_type__in=types_by_ct)
+            .order_by("title", "pk")
+            .values_list("title", "path", "url_path", "content_type")
+        )
+        indicator_paths = {
+            path: title for title, path, _, content_type in rows if content_type == indicator_ct
+        }
+
+        entries = []
+        for title, path, url_path, content_type in rows:
+            url = _relative_url(url_path, root_paths)
+            if url is None:
+                continue
+            indicator = None
+            if content_type != indicator_ct:
+                # Metrics sit directly under their indicator; Methods and SOPs
+                # one level further down.
+                indicator = indicator_paths.get(path[:-Page.steplen]) or indicator_paths.get(
+                    path[:-2 * Page.steplen]
+                )
+            entries.append((title, url, types_by_ct[content_type], indicator))
+        return cls(entries)
+
+    @staticmethod
+    def _scan(keys, prefix):
+        for i in range(bisect_left(keys, (prefix,)), len(keys)):
+            key, position = keys[i]
+            if not key.startswith(prefix):
+                break
+            yield position
+
+    def suggest(self, query: str, limit: int = DEFAULT_LIMIT) -> list[dict]:
+        """Return up to ``limit`` suggestions for the typed ``query``."""
+        prefix = normalize(query)
+        if not prefix:
+            return []
+        seen = set()
+        results = []
+        for keys in (self.title_keys, self.word_keys):
+            for position in self._scan(keys, prefix):
+                if position in seen:
+                    continue
+                seen.add(position)
+                title, url, kind, indicator = self.entries[position]
+                results.append(
+                    {"title": title, "url": url, "type": kind, "indicator": indicator}
+                )
+                if len(results) >= limit:
+                    return results
+        return results
+
+
+_index: SuggestionIndex | None = None
+_lock = threading.Lock()
+
+
+def get_suggestion_index() -> SuggestionIndex:
+    """Return the process-wide index, rebuilt after a catalog change."""
+    global _index
+    version = get_version()
+    if _index is None or _index.version != version:
+        with _lock:
+            if _index is None or _index.version != version:
+                index = SuggestionIndex.build()
+                index.version = version
+                _index = index
+    return _index
+
+
+def reset():
+    """Drop the process-wide index (it is rebuilt on next use)."""
+    global _index
+    with _lock:
+        _index = None
@@ -0,0 +1,583 @@
+import csv
+import io
+import json
+import tempfile
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from home.models import HomePage
+from catalog.models import IndicatorPage, MethodPage, MetricPage, SOPPage
+
+from mysite import ratelimit
+from search import analytics, engine, fuzzy, suggest
+from search.models import ConcurrencySlot, SearchQueryLog
+from search.results import normalize_criteria
+from wagtail.models import Page, Site
+from wagtail.test.utils import WagtailPageTestCase
+
+
+class SearchFilterTests(WagtailPageTestCase):
+    """
+    Tests for the dimension / indicator type filters on the search page.
+    """
+
+    def setUp(self):
+        """
+        Create a small Indicator -> Metric tree with inconsistently cased facets.
+        """
+        cache.clear()
+        fuzzy.reset()
+        root_page = Page.objects.get(pk=1)
+        self.homepage = HomePage(title="Catalog", slug="catalog")
+        root_page.add_child(instance=self.homepage)
+
+        self.water = IndicatorPage(
+            title="Water access", dimension="  Resilience ", indicator_type="Outcome"
+        )
+        self.homepage.add_child(instance=self.water)
+        self.water_metric = MetricPage(title="Households with piped water")
+        self.water.add_child(instance=self.water_metric)
+
+        self.crops = IndicatorPage(
+            title="Crop yields", dimension="resilience", indicator_type="output"
+        )
+        self.homepage.add_child(instance=self.crops)
+        self.crops_metric = MetricPage(title="Maize yield per hectare")
+        self.crops.add_child(instance=self.crops_metric)
+
+        self.finance = IndicatorPage(
+            title="Climate finance", dimension="Capacity", indicator_type="Output"
+        )
+        self.homepage.add_child(instance=self.finance)
+
+    def search(self, **params):
+        response = self.client.get(reverse("search"), params)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def displayed_titles(self, response):
+        rows = response.context["indicator_rows"]
+        return [indicator.title for indicator in rows]
+
+    def test_dimension_filter_ignores_case_and_whitespace(self):
+        response = self.search(dimension="Resilience")
+        self.assertEqual(self.displayed_titles(response), ["Crop yields", "Water access"])
+
+    def test_indicator_type_filter_narrows_metrics(self):
+        response = self.search(indicator_type="OUTPUT")
+        self.assertEqual(self.displayed_titles(response), ["Climate finance", "Crop yields"])
+        self.assertEqual(response.context["metric_count"], 1)
+
+    def test_combined_filters(self):
+        response = self.search(dimension="resilience", indicator_type="outcome")
+        self.assertEqual(self.displayed_titles(response), ["Water access"])
+        metrics = [m.title for row in response.context["indicator_rows"] for m in row.metric_list]
+        self.assertEqual(metrics, ["Households with piped water"])
+
+    def test_indicator_filter_keeps_only_its_metrics(self):
+        response = self.search(indicator=self.crops.pk)
+        self.assertEqual(self.displayed_titles(response), ["Crop yields"])
+        metrics = [m.title for row in response.context["indicator_rows"] for m in row.metric_list]
+        self.assertEqual(metrics, ["Maize yield per hectare"])
+
+    def test_out_of_range_indicator_is_ignored(self):
+        response = self.search(indicator="9" * 25)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(normalize_criteria(indicator="9" * 25)[3], "")
+        self.assertEqual(normalize_criteria(indicator=f"00{self.crops.pk}")[3], str(self.crops.pk))
+
+    def test_metric_hit_lists_its_parent_indicator(self):
+        response = self.search(query="maize")
+        self.assertEqual(self.displayed_titles(response), ["Crop yields"])
+
+    def test_pagination_loads_metrics_for_page_only(self):
+        for n in range(10):
+            indicator = IndicatorPage(title=f"Zz indicator {n:02d}", dimension="Resilience")
+            self.homepage.add_child(instance=indicator)
+            indicator.add_child(instance=MetricPage(title=f"Zz metric {n:02d}"))
+
+        first = self.search(dimension="resilience")
+        self.assertEqual(first.context["indicator_count"], 12)
+        self.assertEqual(first.context["metric_count"], 12)
+
+        second = self.search(dimension="resilience", page=2)
+        self.assertEqual(self.displayed_titles(second), ["Zz indicator 08", "Zz indicator 09"])
+        metrics = [m.title for row in second.context["indicator_rows"] for m in row.metric_list]
+        self.assertEqual(metrics, ["Zz metric 08", "Zz metric 09"])
+
+    def test_repeated_search_is_served_from_cache(self):
+        self.search(dimension="resilience")
+        with mock.patch("search.results._compute_results") as compute:
+            response = self.search(dimension="Resilience ")
+        compute.assert_not_called()
+        self.assertEqual(self.displayed_titles(response), ["Crop yields", "Water access"])
+
+    def test_publishing_invalidates_cached_results(self):
+        self.search(dimension="resilience")
+        soil = IndicatorPage(title="Soil health", dimension="Resilience", live=False)
+        self.homepage.add_child(instance=soil)
+        soil.save_revision().publish()
+        response = self.search(dimension="resilience")
+        self.assertEqual(
+            self.displayed_titles(response), ["Crop yields", "Soil health", "Water access"]
+        )
+
+    def test_moving_a_metric_invalidates_cached_results(self):
+        self.search(indicator_type="output")
+        self.water_metric.move(self.crops, pos="last-child")
+        response = self.search(indicator_type="output")
+        metrics = [m.title for row in response.context["indicator_rows"] for m in row.metric_list]
+        self.assertIn("Households with piped water", metrics)
+
+    def test_filter_options_endpoint(self):
+        response = self.client.get(reverse("search_options"))
+        data = response.json()
+        self.assertEqual(data["dimensions"], ["Capacity", "Resilience"])
+        self.assertEqual(data["indicator_types"], ["Outcome", "output"])
+        self.assertEqual(
+            [ind["title"] for ind in data["indicators"]],
+            ["Climate finance", "Crop yields", "Water access"],
+        )
+
+    def test_search_page_does_not_embed_indicator_list(self):
+        response = self.search()
+        self.assertNotContains(response, "Climate finance</option>")
+        response = self.search(indicator=self.finance.pk)
+        self.assertContains(response, "Climate finance</option>")
+
+    def test_filter_options_rebuilt_on_indicator_publish(self):
+        self.client.get(reverse("search_options"))
+        soil = IndicatorPage(title="Soil health", dimension="Ecosystems", live=False)
+        self.homepage.add_child(instance=soil)
+        soil.save_revision().publish()
+        data = self.client.get(reverse("search_options")).json()
+        self.assertIn("Ecosystems", data["dimensions"])
+
+    def test_fragment_mode_renders_only_results(self):
+        response = self.search(dimension="resilience", fragment="results")
+        self.assertTemplateUsed(response, "search/_results.html")
+        self.assertTemplateNotUsed(response, "base.html")
+        self.assertContains(response, "Crop yields")
+        self.assertNotContains(response, "<select")
+        self.assertIn("X-Search-Fragment", response["Vary"])
+
+    def test_fragment_mode_via_header(self):
+        response = self.client.get(
+            reverse("search"), {"dimension": "resilience"}, HTTP_X_SEARCH_FRAGMENT="results"
+        )
+        self.assertTemplateNotUsed(response, "base.html")
+        self.assertEqual(self.displayed_titles(response), ["Crop yields", "Water access"])
+
+    def test_facet_counts_follow_the_other_filter(self):
+        response = self.search(indicator_type="output")
+        self.assertEqual(
+            response.context["facet_counts"],
+            {
+                "dimensions": {"capacity": 1, "resilience": 1},
+                "indicator_types": {"outcome": 1, "output": 2},
+            },
+        )
+        self.assertContains(response, "Resilience (1)</option>")
+        self.assertContains(response, "output (2)</option>")
+
+    def test_facet_counts_follow_the_query(self):
+        response = self.search(query="maize")
+        counts = response.context["facet_counts"]
+        self.assertEqual(counts["dimensions"], {"resilience": 1})
+        self.assertContains(response, "Capacity (0)</option>")
+
+    def test_facet_counts_cached_with_results(self):
+        self.search(dimension="capacity")
+        with mock.patch("search.results._compute_results") as compute:
+            response = self.search(dimension="capacity", fragment="results")
+        compute.assert_not_called()
+        self.assertContains(response, 'id="search-facet-counts"')
+        self.assertEqual(response.context["facet_counts"]["indicator_types"], {"output": 1})
+
+    def test_result_snippet_centres_on_the_match(self):
+        self.water.description = (
+            "<p>" + " ".join(f"filler{n}" for n in range(60))
+            + " Households with <b>piped</b> water inside the dwelling.</p>"
+        )
+        self.water.save_revision().publish()
+        response = self.search(query="piped")
+        card = response.context["indicator_rows"][0]
+        self.assertTrue(card.snippet.startswith("… "))
+        self.assertIn("Households with <mark>piped</mark> water", card.snippet)
+        self.assertContains(response, "<mark>piped</mark>")
+        self.assertNotContains(response, "filler0 ")
+
+    def test_result_snippet_without_query_is_the_opening(self):
+        self.water.description = "<p>Share of households with <i>piped</i> water &amp; sanitation.</p>"
+        self.water.save_revision().publish()
+        response = self.search(dimension="resilience")
+        cards = {card.title: card for card in response.context["indicator_rows"]}
+        self.assertEqual(
+            cards["Water access"].snippet, "Share of households with piped water &amp; sanitation."
+        )
+
+    def test_csv_export_applies_filters(self):
+        response = self.client.get(reverse("search"), {"dimension": "resilience", "export": "csv"})
+        self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+        rows = list(csv.reader(io.StringIO(b"".join(response.streaming_content).decode())))
+        self.assertEqual(rows[0][:2], ["indicator_id", "indicator_title"])
+        self.assertEqual(
+            [(row[1], row[2], row[6]) for row in rows[1:]],
+            [
+                ("Crop yields", "resilience", "Maize yield per hectare"),
+                ("Water access", "Resilience", "Households with piped water"),
+            ],
+        )
+
+    def test_csv_export_neutralises_formulas(self):
+        self.water.title = '=HYPERLINK("http://example.com","Water")'
+        self.water.save_revision().publish()
+        response = self.client.get(reverse("search"), {"indicator": self.water.pk, "export": "csv"})
+        rows = list(csv.reader(io.StringIO(b"".join(response.streaming_content).decode())))
+        self.assertEqual(rows[1][1], '\'=HYPERLINK("http://example.com","Water")')
+        self.assertEqual(rows[1][6], "Households with piped water")
+
+    def test_ndjson_export_streams_in_chunks(self):
+        with mock.patch("search.export.EXPORT_CHUNK_SIZE", 1):
+            response = self.client.get(reverse("search"), {"export": "ndjson"})
+            lines = b"".join(response.streaming_content).decode().splitlines()
+        records = [json.loads(line) for line in lines]
+        self.assertEqual(
+            [record["title"] for record in records],
+            ["Climate finance", "Crop yields", "Water access"],
+        )
+        self.assertEqual(records[0]["metrics"], [])
+        self.assertEqual(
+            [metric["title"] for metric in records[1]["metrics"]], ["Maize yield per hectare"]
+        )
+
+    def test_benchmark_does_not_record_analytics(self):
+        self.addCleanup(engine.reset)
+        self.addCleanup(analytics.buffer.clear)
+        with override_settings(SEARCH_ANALYTICS={"ENABLED": True, "FLUSH_SIZE": 1000}):
+            call_command(
+                "benchmark_search", query=["maize"], engine=["database"], page=[1],
+                repeat=1, stdout=io.StringIO(),
+            )
+        self.assertEqual(analytics.buffer.samples, [])
+        self.assertFalse(SearchQueryLog.objects.exists())
+
+    def test_benchmark_report(self):
+        self.addCleanup(engine.reset)
+        with tempfile.NamedTemporaryFile("r", suffix=".json") as report_file:
+            call_command(
+                "benchmark_search", query=["maize"], engine=["database", "memory"], page=[1],
+                repeat=2, output=report_file.name, stdout=io.StringIO(),
+            )
+            report = json.load(report_file)
+        self.assertEqual(report["corpus"]["indicators"], 3)
+        runs = {(run["engine"], run["scenario"], run["cache"]): run for run in report["runs"]}
+        self.assertEqual(runs["memory", "query:maize", "cold"]["hits"], 1)
+        self.assertEqual(runs["database", "dimension", "warm"]["hits"], 2)
+        self.assertEqual(
+            set(runs["database", "all", "cold"]["latency_ms"]), {"p50", "p90", "p95", "p99", "mean", "max"}
+        )
+        self.assertGreater(
+            runs["database", "all", "cold"]["queries"], runs["database", "all", "warm"]["queries"]
+        )
+
+    def test_misspelt_query_shows_corrected_results(self):
+        response = self.search(query="pipped")
+        self.assertEqual(response.context["corrected_query"], "piped")
+        self.assertEqual(self.displayed_titles(response), ["Water access"])
+        self.assertContains(response, "Showing results for")
+
+    def test_correction_keeps_filters(self):
+        response = self.search(query="pipped", dimension="resilience")
+        self.assertContains(response, 'href="?query=piped&dimension=resilience"')
+
+    def test_corrections_come_from_body_text(self):
+        self.crops.description = "<p>Share of farms under irrigation</p>"
+        self.crops.save_revision().publish()
+        response = self.search(query="irigation")
+        self.assertEqual(response.context["corrected_query"], "irrigation")
+        self.assertEqual(self.displayed_titles(response), ["Crop yields"])
+
+    def test_unmatched_query_without_correction(self):
+        response = self.search(query="zzzzqqq")
+        self.assertIsNone(response.context["corrected_query"])
+        self.assertFalse(response.context["has_results"])
+
+    def add_crop_children(self):
+        self.crops_metric.add_child(instance=SOPPage(
+            title="Yield survey", data_sources="<p>CHIRPS rainfall estimates</p>",
+        ))
+        self.crops_metric.add_child(instance=MethodPage(
+            title="Remote sensing", resources="<ul><li>Sentinel-2 imagery</li></ul>",
+        ))
+
+    def test_sop_and_method_hits_list_their_metric(self):
+        self.add_crop_children()
+        for query in ("chirps", "sentinel"):
+            response = self.search(query=query)
+            self.assertEqual(self.displayed_titles(response), ["Crop yields"])
+            metrics = [m.title for row in response.context["indicator_rows"] for m in row.metric_list]
+            self.assertEqual(metrics, ["Maize yield per hectare"])
+
+    @override_settings(CATALOG_SEARCH_ENGINE="memory")
+    def test_sop_hits_with_memory_engine(self):
+        self.add_crop_children()
+        self.addCleanup(engine.reset)
+        engine.reset()
+        response = self.search(query="chirps rainfall")
+        self.assertEqual(self.displayed_titles(response), ["Crop yields"])
+
+
+@override_settings(CATALOG_SEARCH_ENGINE="memory")
+class CatalogIndexTests(WagtailPageTestCase):
+    """
+    Tests for the in-process BM25 engine.
+    """
+
+    def setUp(self):
+        cache.clear()
+        engine.reset()
+        fuzzy.reset()
+        root_page = Page.objects.get(pk=1)
+        self.homepage = HomePage(title="Catalog", slug="catalog")
+        root_page.add_child(instance=self.homepage)
+
+        self.drought = IndicatorPage(title="Drought exposure", description="<p>Rainfall deficits</p>")
+        self.homepage.add_child(instance=self.drought)
+        self.rainfall = MetricPage(
+            title="Rainfall variability", description="<p>Seasonal <b>drought</b> risk</p>"
+        )
+        self.drought.add_child(instance=self.rainfall)
+
+    def tearDown(self):
+        engine.reset()
+
+    def test_title_match_outranks_body_match(self):
+        results = engine.get_index().search("drought")
+        self.assertEqual([pk for pk, _ in results], [self.drought.pk, self.rainfall.pk])
+
+    def test_every_term_must_match(self):
+        self.assertEqual(engine.search_ids("rainfall risk"), [self.rainfall.pk])
+        self.assertEqual(engine.search_ids("rainfall flooding"), [])
+
+    def test_search_view_uses_the_index(self):
+        engine.get_index()
+        with mock.patch("wagtail.models.PageQuerySet.search") as db_search:
+            response = self.client.get(reverse("search"), {"query": "seasonal"})
+        db_search.assert_not_called()
+        rows = response.context["indicator_rows"]
+        self.assertEqual([indicator.title for indicator in rows], ["Drought exposure"])
+        self.assertEqual([m.title for m in rows[0].metric_list], ["Rainfall variability"])
+
+    def test_corrections_come_from_the_index_vocabulary(self):
+        # "seasonal" only appears in a description, which the memory engine indexes.
+        self.assertEqual(fuzzy.correct_query("seasonl risk"), "seasonal risk")
+        self.assertIsNone(fuzzy.correct_query("seasonal risk"))
+
+    def test_publish_and_unpublish_update_the_index(self):
+        index = engine.get_index()
+        self.assertEqual(engine.search_ids("salinity"), [])
+
+        soil = IndicatorPage(title="Soil salinity", live=False)
+        self.homepage.add_child(instance=soil)
+        soil.save_revision().publish()
+        self.assertEqual(engine.search_ids("salinity"), [soil.pk])
+
+        self.rainfall.unpublish()
+        self.assertEqual(engine.search_ids("seasonal"), [])
+        self.assertIs(engine.get_index(), index)
+
+
+class SuggestTests(WagtailPageTestCase):
+    """
+    Tests for the /search/suggest/ autocomplete endpoint.
+    """
+
+    def setUp(self):
+        cache.clear()
+        suggest.reset()
+        root_page = Page.objects.get(pk=1)
+        self.homepage = HomePage(title="Catalog", slug="catalog")
+        root_page.add_child(instance=self.homepage)
+        Site.objects.update(root_page=self.homepage)
+
+        self.yields = IndicatorPage(title="Crop yields")
+        self.homepage.add_child(instance=self.yields)
+        self.maize = MetricPage(title="Maize yield per hectare")
+        self.yields.add_child(instance=self.maize)
+
+    def tearDown(self):
+        suggest.reset()
+
+    def suggestions(self, q, **params):
+        response = self.client.get(reverse("search_suggest"), {"q": q, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.json()["suggestions"]
+
+    def test_title_start_ranks_before_later_word(self):
+        self.homepage.add_child(instance=IndicatorPage(title="Yield gaps"))
+        titles = [s["title"] for s in self.suggestions("yie")]
+        self.assertEqual(titles[0], "Yield gaps")
+        self.assertCountEqual(titles[1:], ["Crop yields", "Maize yield per hectare"])
+
+    def test_suggestion_carries_url_and_indicator(self):
+        [suggestion] = self.suggestions("maize y")
+        self.assertEqual(suggestion["type"], "metric")
+        self.assertEqual(suggestion["indicator"], "Crop yields")
+        self.assertEqual(suggestion["url"], self.maize.url)
+
+    def test_limit(self):
+        self.assertEqual(len(self.suggestions("yie", limit=1)), 1)
+
+    def test_served_without_database_queries(self):
+        self.suggestions("crop")
+        with self.assertNumQueries(0):
+            self.suggestions("maize")
+
+    def test_rebuilt_on_publish(self):
+        self.assertEqual(self.suggestions("soil"), [])
+        soil = IndicatorPage(title="Soil health", live=False)
+        self.homepage.add_child(instance=soil)
+        soil.save_revision().publish()
+        self.assertEqual([s["title"] for s in self.suggestions("soil")], ["Soil health"])
+
+
+@override_settings(SEARCH_ANALYTICS={"ENABLED": True, "FLUSH_SIZE": 3, "FLUSH_INTERVAL": 3600})
+class SearchAnalyticsTests(WagtailPageTestCase):
+    """
+    Tests for search analytics sampling and the admin report.
+    """
+
+    def setUp(self):
+        cache.clear()
+        analytics.buffer.flush()
+        SearchQueryLog.objects.all().delete()
+        root_page = Page.objects.get(pk=1)
+        self.homepage = HomePage(title="Catalog", slug="catalog")
+        root_page.add_child(instance=self.homepage)
+        self.homepage.add_child(
+            instance=IndicatorPage(title="Water access", dimension="Resilience")
+        )
+
+    def tearDown(self):
+        analytics.buffer.clear()
+
+    def search(self, **params):
+        return self.client.get(reverse("search"), params)
+
+    def test_samples_are_buffered_then_written_in_bulk(self):
+        self.search(query="Water")
+        self.search(query="nothing here", dimension="Resilience ")
+        self.assertFalse(SearchQueryLog.objects.exists())
+
+        self.search(query="water")
+        logs = SearchQueryLog.objects.order_by("pk")
+        self.assertEqual(
+            [(log.query, log.dimension, log.indicator_count) for log in logs],
+            [("water", "", 1), ("nothing here", "resilience", 0), ("water", "", 1)],
+        )
+        self.assertTrue(all(log.total_ms >= log.backend_ms for log in logs))
+
+    def test_oversized_filters_are_truncated(self):
+        self.search(query="water", dimension="x" * 500, indicator_type="y" * 500)
+        analytics.buffer.flush()
+        log = SearchQueryLog.objects.get()
+        self.assertEqual(log.dimension, "x" * 150)
+        self.assertEqual(log.indicator_type, "y" * 150)
+
+    def test_admin_report_lists_slow_and_zero_result_queries(self):
+        SearchQueryLog.objects.create(query="drought", indicator_count=0, backend_ms=5, total_ms=9)
+        SearchQueryLog.objects.create(query="water", indicator_count=4, backend_ms=400, total_ms=450)
+        self.login()
+        response = self.client.get(reverse("search_analytics"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [row["query"] for row in response.context["slow_queries"]], ["water", "drought"]
+        )
+        self.assertEqual(
+            [row["query"] for row in response.context["zero_result_queries"]], ["drought"]
+        )
+
+
+@override_settings(RATE_LIMIT={
+    "BUCKETS": {"search": {"RATE": 0.5, "BURST": 2}, "forms": {"RATE": 0.01, "BURST": 1}},
+    "CONCURRENCY": {"search": 1},
+})
+class RateLimitTests(WagtailPageTestCase):
+    """Token-bucket rate limiting and load shedding of the public endpoints."""
+
+    def setUp(self):
+        cache.clear()
+
+    def search(self, ip="203.0.113.7"):
+        return self.client.get(reverse("search"), HTTP_X_FORWARDED_FOR=f"10.0.0.1, {ip}")
+
+    def test_search_is_limited_per_client(self):
+        self.assertEqual(self.search().status_code, 200)
+        self.assertEqual(self.search().status_code, 200)
+        response = self.search()
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response["Retry-After"], "2")
+        # Another client (by forwarded address) has its own bucket.
+        self.assertEqual(self.search(ip="198.51.100.1").status_code, 200)
+
+    def test_bucket_refills_over_time(self):
+        with mock.patch("mysite.ratelimit.time.time", return_value=1000.0):
+            self.search()
+            self.search()
+            self.assertEqual(self.search().status_code, 429)
+        with mock.patch("mysite.ratelimit.time.time", return_value=1002.0):
+            self.assertEqual(self.search().status_code, 200)
+            self.assertEqual(self.search().status_code, 429)
+
+    def test_forms_limit_posts_only(self):
+        self.client.post(reverse("feedback"), {}, REMOTE_ADDR="192.0.2.5")
+        response = self.client.post(reverse("feedback"), {}, REMOTE_ADDR="192.0.2.5")
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(self.client.get(reverse("feedback")).status_code, 200)
+
+    def test_search_sheds_load_beyond_concurrency_cap(self):
+        token = ratelimit.acquire_slot("search", 1)
+        response = self.search()
+        self.assertEqual(response.status_code, 503)
+        self.assertIn("Retry-After", response)
+
+        ratelimit.release_slot("search", token)
+        self.assertEqual(self.search().status_code, 200)
+        self.assertFalse(ConcurrencySlot.objects.exclude(holder="").exists())
+
+    @override_settings(RATE_LIMIT={"CONCURRENCY": {"search": 1}, "CONCURRENCY_TIMEOUT": 60})
+    def test_long_export_renews_its_lease(self):
+        start = timezone.now()
+        response = self.client.get(reverse("search"), {"export": "csv"})
+        content = iter(response.streaming_content)
+        with mock.patch("mysite.ratelimit.timezone.now", return_value=start + timedelta(seconds=50)):
+            next(content)
+        # Past the first lease, but the export is still streaming.
+        with mock.patch("mysite.ratelimit.timezone.now", return_value=start + timedelta(seconds=100)):
+            self.assertEqual(self.search().status_code, 503)
+        response.close()
+        self.assertEqual(self.search().status_code, 200)
+
+    def test_lost_release_expires(self):
+        # A worker killed mid-request never releases its slot.
+        with mock.patch("mysite.ratelimit.release_slot"):
+            self.assertEqual(self.search().status_code, 200)
+        self.assertEqual(self.search().status_code, 503)
+
+        later = timezone.now() + timedelta(seconds=121)
+        with mock.patch("mysite.ratelimit.timezone.now", return_value=later):
+            self.assertEqual(self.search(ip="198.51.100.1").status_code, 200)
+            self.assertEqual(self.search(ip="198.51.100.1").status_code, 200)
+
+    def test_export_holds_its_slot_until_streamed(self):
+        response = self.client.get(reverse("search"), {"export": "csv"})
+        self.assertEqual(self.search().status_code, 503)
+        b"".join(response.streaming_content)
+        response.close()
+        self.assertEqual(self.search().status_code, 200)
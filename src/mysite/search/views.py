@@ -1,24 +1,63 @@
-from collections import defaultdict
+import time
+from datetime import timedelta
 
 from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
+from django.db.models import Avg, Count, Max, Q
+from django.http import JsonResponse
+from django.shortcuts import render
 from django.template.response import TemplateResponse
-from django.contrib.contenttypes.models import ContentType
-from django.db.models import Q
+from django.utils import timezone
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.decorators import method_decorator
+from django.contrib.auth.decorators import user_passes_test
+from django.views import View
 
-from wagtail.models import Page
+from catalog.models import IndicatorPage, MetricPage, facet_key
+from catalog.views import is_admin
+from mysite.ratelimit import rate_limit, shed_load
 
+from . import analytics
+from .export import EXPORT_FORMATS, export_response
+from .models import SearchQueryLog
+from .options import OPTIONS_CACHE_TIMEOUT, filter_options_version, get_filter_options
+from .results import get_results, normalize_criteria
+from .snippets import snippet
+from .suggest import DEFAULT_LIMIT, MAX_LIMIT, get_suggestion_index
 
+
+# Fragment mode: ``?fragment=results`` (or an ``X-Search-Fragment: results``
+# header) renders only the results list and pagination, which the search page
+# swaps in place when a filter changes.
+FRAGMENT_HEADER = "HTTP_X_SEARCH_FRAGMENT"
+
+
+# Snippet lengths, in words, on the indicator and metric cards.
+INDICATOR_SNIPPET_WORDS = 35
+METRIC_SNIPPET_WORDS = 25
+
+
+def _wants_fragment(request):
+    return "results" in (request.GET.get("fragment"), request.META.get(FRAGMENT_HEADER))
+
+
+def _facet_options(labels, counts):
+    """Dropdown options as ``{label, key, count}``, counting the current result set."""
+    options = []
+    for label in labels:
+        key = facet_key(label)
+        options.append({"label": label, "key": key, "count": counts.get(key, 0)})
+    return options
+
+
+@rate_limit("search")
+@shed_load("search")
 def search(request):
+    started = time.perf_counter()
     search_query = request.GET.get("query", None)
     dimension_filter = request.GET.get("dimension", None)
     indicator_type_filter = request.GET.get("indicator_type", None)
     indicator_filter = request.GET.get("indicator", None)
 
-    indicator_ct = ContentType.objects.get(app_label='catalog', model='indicatorpage')
-    metric_ct = ContentType.objects.get(app_label='catalog', model='metricpage')
-    sop_ct = ContentType.objects.get(app_label='catalog', model='soppage')
-    searchable_content_types = [indicator_ct, metric_ct, sop_ct]
-
     # Some requests send query as literal strings like "None" or "null".
     if search_query is not None:
         search_query = search_query.strip()
@@ -33,120 +72,22 @@ def search(request):
     indicator_type_filter = _norm(indicator_type_filter)
     indicator_filter = _norm(indicator_filter)
 
-    from catalog.models import IndicatorPage, MetricPage, SOPPage
-
-    # Base querysets for each column. The page always shows both Indicators and
-    # Metrics; the filters below narrow them with criteria that actually exist
-    # in the data (so no option silently filters nothing).
-    indicator_qs = IndicatorPage.objects.live()
-    metric_qs = MetricPage.objects.live()
-
-    # Free-text search applies across both columns.
-    if search_query:
-        search_pks = {
-            r.pk for r in
-            Page.objects.live().filter(content_type__in=searchable_content_types).search(search_query)
-        }
-        indicator_qs = indicator_qs.filter(pk__in=search_pks)
-        metric_qs = metric_qs.filter(pk__in=search_pks)
-
-    # Dimension / Subdimension are Indicator attributes. They filter Indicators
-    # directly, and Metrics via their parent Indicator so both columns stay in sync.
-    # Matching is normalized (trim + casefold) so a single cleaned dropdown option
-    # still matches records stored with inconsistent whitespace/casing.
-    def _matching_indicator_ids(field, value):
-        target = value.strip().lower()
-        return [
-            obj.pk for obj in IndicatorPage.objects.live().only('pk', field)
-            if (getattr(obj, field) or '').strip().lower() == target
-        ]
-
-    if dimension_filter:
-        indicator_qs = indicator_qs.filter(pk__in=_matching_indicator_ids('dimension', dimension_filter))
-    if indicator_type_filter:
-        indicator_qs = indicator_qs.filter(pk__in=_matching_indicator_ids('indicator_type', indicator_type_filter))
-
-    if dimension_filter or indicator_type_filter:
-        parent_indicators = IndicatorPage.objects.live()
-        if dimension_filter:
-            parent_indicators = parent_indicators.filter(pk__in=_matching_indicator_ids('dimension', dimension_filter))
-        if indicator_type_filter:
-            parent_indicators = parent_indicators.filter(pk__in=_matching_indicator_ids('indicator_type', indicator_type_filter))
-        parent_paths = list(parent_indicators.values_list('path', flat=True))
-        if parent_paths:
-            path_q = Q()
-            for p in parent_paths:
-                path_q |= Q(path__startswith=p)
-            metric_qs = metric_qs.filter(path_q)
-        else:
-            metric_qs = metric_qs.none()
-
-    # A specific indicator selection narrows everything to that one indicator
-    # (and the metrics nested beneath it).
-    if indicator_filter:
-        indicator_qs = indicator_qs.filter(pk=indicator_filter)
-        selected = IndicatorPage.objects.live().filter(pk=indicator_filter).first()
-        if selected:
-            metric_qs = metric_qs.filter(path__startswith=selected.path)
-        else:
-            metric_qs = metric_qs.none()
-
-    indicator_qs = indicator_qs.order_by('title')
-    metric_qs = metric_qs.order_by('path')
-
-    # Group matching metrics under their parent indicator's tree path.
-    metrics_by_parent = defaultdict(list)
-    for metric in metric_qs:
-        metrics_by_parent[metric.path[:-metric.steplen]].append(metric)
-
-    # Indicators to display: those matching the indicator-level filters, plus the
-    # parents of any matching metric (so a metric search hit still appears under
-    # its indicator even when the indicator itself didn't match the query).
-    display_ids = set(indicator_qs.values_list('id', flat=True))
-    if metrics_by_parent:
-        display_ids |= set(
-            IndicatorPage.objects.live()
-            .filter(path__in=list(metrics_by_parent.keys()))
-            .values_list('id', flat=True)
-        )
-    display_indicators = (
-        IndicatorPage.objects.live().filter(id__in=display_ids).order_by('title')
+    # Matching indicator IDs (display order) and their metric IDs, served from
+    # the versioned result cache when this combination was searched before.
+    criteria = normalize_criteria(
+        search_query, dimension_filter, indicator_type_filter, indicator_filter
     )
+    results = get_results(criteria)
+    backend_ms = (time.perf_counter() - started) * 1000
 
-    # One row per indicator with its matching metrics nested.
-    rows = []
-    for indicator in display_indicators:
-        indicator.metric_list = metrics_by_parent.get(indicator.path, [])
-        rows.append(indicator)
-
-    indicator_count = len(rows)
-    metric_count = sum(len(ind.metric_list) for ind in rows)
-    has_results = bool(rows)
-
-    # Dropdown options, built from real data so every option matches something.
-    # Collapse near-duplicates (differing only by surrounding whitespace/casing)
-    # so the same label doesn't appear twice, while keeping a value that matches
-    # actual stored records.
-    def _distinct_options(values):
-        seen = {}
-        for v in values:
-            if not v or not v.strip():
-                continue
-            key = v.strip().lower()
-            seen.setdefault(key, v.strip())
-        return sorted(seen.values(), key=str.lower)
-
-    dimensions = _distinct_options(
-        IndicatorPage.objects.live().values_list('dimension', flat=True)
-    )
-    indicator_types = _distinct_options(
-        IndicatorPage.objects.live().values_list('indicator_type', flat=True)
-    )
-    # Full list of indicators for the Indicators dropdown.
-    all_indicators = IndicatorPage.objects.live().order_by('title')
+    # Export mode streams the whole result set instead of rendering a page.
+    export_format = request.GET.get("export")
+    if export_format in EXPORT_FORMATS:
+        return export_response(request, results, export_format)
 
-    # Paginate by indicator (one row each, with its metrics nested).
-    paginator = Paginator(rows, 10)
+    # Paginate by indicator (one row each, with its metrics nested). Only the
+    # indicators on screen, and their metrics, are loaded from the database.
+    paginator = Paginator(results["indicators"], 10)
     page_number = request.GET.get('page', 1)
     try:
         indicator_rows = paginator.page(page_number)
@@ -155,20 +96,152 @@ def search(request):
     except EmptyPage:
         indicator_rows = paginator.page(paginator.num_pages)
 
-    return TemplateResponse(
-        request,
-        "search/search.html",
-        {
-            "search_query": search_query,
-            "has_results": has_results,
-            "indicator_rows": indicator_rows,
-            "indicator_count": indicator_count,
-            "metric_count": metric_count,
-            "dimension_filter": dimension_filter,
-            "indicator_type_filter": indicator_type_filter,
-            "indicator_filter": indicator_filter,
-            "dimensions": dimensions,
-            "indicator_types": indicator_types,
-            "all_indicators": all_indicators,
-        },
+    # Cards show snippets of the stored plain text, so the rich-text bodies
+    # themselves aren't loaded.
+    page_ids = list(indicator_rows.object_list)
+    indicators = IndicatorPage.objects.defer(*IndicatorPage.search_text_fields()).in_bulk(page_ids)
+    metrics = MetricPage.objects.defer(*MetricPage.search_text_fields()).in_bulk(
+        [pk for ind_id in page_ids for pk in results["metrics"].get(ind_id, [])]
+    )
+    highlight_query = results.get("corrected_query") or criteria[0]
+    rows = []
+    for ind_id in page_ids:
+        indicator = indicators.get(ind_id)
+        if indicator is None:
+            continue
+        indicator.snippet = snippet(indicator.search_text, highlight_query, INDICATOR_SNIPPET_WORDS)
+        indicator.metric_list = []
+        for pk in results["metrics"].get(ind_id, []):
+            if pk in metrics:
+                metric = metrics[pk]
+                metric.snippet = snippet(metric.search_text, highlight_query, METRIC_SNIPPET_WORDS)
+                indicator.metric_list.append(metric)
+        rows.append(indicator)
+    indicator_rows.object_list = rows
+
+    indicator_count = paginator.count
+    metric_count = sum(len(ids) for ids in results["metrics"].values())
+    has_results = indicator_count > 0
+
+    context = {
+        "search_query": search_query,
+        "corrected_query": results.get("corrected_query"),
+        "has_results": has_results,
+        "indicator_rows": indicator_rows,
+        "indicator_count": indicator_count,
+        "metric_count": metric_count,
+        "dimension_filter": dimension_filter,
+        "indicator_type_filter": indicator_type_filter,
+        "indicator_filter": indicator_filter,
+        # Per-option counts (facet key -> indicators), refreshed by the page
+        # after every fragment swap.
+        "facet_counts": results["facets"],
+    }
+
+    if _wants_fragment(request):
+        # The filter bar is already on the page: skip the options and the chrome.
+        template = "search/_results.html"
+    else:
+        template = "search/search.html"
+        # Dropdown options, built from real data so every option matches something
+        # and precomputed until an indicator changes. The full indicator list is
+        # fetched lazily by the page (see ``filter_options``); the HTML only carries
+        # the current selection.
+        options = get_filter_options()
+        selected_indicator = None
+        if indicator_filter:
+            selected_indicator = next(
+                (ind for ind in options["indicators"] if str(ind["id"]) == indicator_filter),
+                None,
+            )
+        context.update({
+            "dimensions": _facet_options(options["dimensions"], results["facets"]["dimensions"]),
+            "indicator_types": _facet_options(
+                options["indicator_types"], results["facets"]["indicator_types"]
+            ),
+            "selected_indicator": selected_indicator,
+            "options_version": filter_options_version(),
+        })
+
+    response = TemplateResponse(request, template, context)
+    patch_vary_headers(response, ["X-Search-Fragment"])
+
+    def record_sample(response):
+        analytics.record(
+            criteria, results, indicator_rows.number, backend_ms,
+            (time.perf_counter() - started) * 1000,
+        )
+
+    # Recorded once rendered, so the total includes template time.
+    response.add_post_render_callback(record_sample)
+    return response
+
+
+def filter_options(request):
+    """The search filter-bar option lists as JSON, fetched lazily by the search page."""
+    response = JsonResponse(get_filter_options())
+    if "v" in request.GET:
+        # Versioned URL: the content for a given version never changes.
+        patch_cache_control(response, public=True, max_age=OPTIONS_CACHE_TIMEOUT)
+    return response
+
+
+def suggest(request):
+    """Search-as-you-type suggestions for ``?q=``, served from the in-memory title index."""
+    query = request.GET.get("q", "")
+    try:
+        limit = min(max(int(request.GET.get("limit", DEFAULT_LIMIT)), 1), MAX_LIMIT)
+    except ValueError:
+        limit = DEFAULT_LIMIT
+    return JsonResponse(
+        {"query": query, "suggestions": get_suggestion_index().suggest(query, limit)}
     )
+
+
+@method_decorator(user_passes_test(is_admin), name='dispatch')
+class SearchAnalyticsView(View):
+    """
+    Admin report of catalog searches: the slowest query/filter combinations
+    and the queries that found nothing, over the last ``days`` days.
+    """
+
+    REPORT_ROWS = 50
+
+    def get(self, request):
+        try:
+            days = max(1, int(request.GET.get('days', 7)))
+        except ValueError:
+            days = 7
+        logs = SearchQueryLog.objects.filter(created_at__gte=timezone.now() - timedelta(days=days))
+        combination = ('query', 'dimension', 'indicator_type')
+
+        slow_queries = (
+            logs.values(*combination)
+            .annotate(
+                searches=Count('id'),
+                avg_ms=Avg('total_ms'),
+                max_ms=Max('total_ms'),
+                avg_backend_ms=Avg('backend_ms'),
+            )
+            .order_by('-avg_ms')[:self.REPORT_ROWS]
+        )
+        zero_result_queries = (
+            logs.filter(indicator_count=0)
+            .exclude(query='')
+            .values(*combination)
+            .annotate(searches=Count('id'), last_seen=Max('created_at'))
+            .order_by('-searches', 'query')[:self.REPORT_ROWS]
+        )
+        summary = logs.aggregate(
+            searches=Count('id'),
+            avg_ms=Avg('total_ms'),
+            zero_results=Count('id', filter=Q(indicator_count=0) & ~Q(query='')),
+        )
+
+        context = {
+            'days': days,
+            'summary': summary,
+            'slow_queries': slow_queries,
+            'zero_result_queries': zero_result_queries,
+        }
+        return render(request, 'search/admin/search_analytics.html', context)
@@ -0,0 +1,24 @@
+from django.urls import path, reverse
+from wagtail import hooks
+from wagtail.admin.menu import MenuItem
+
+from .views import SearchAnalyticsView
+
+
+@hooks.register("register_admin_urls")
+def register_search_analytics_url():
+    """Register the search analytics report URL in Wagtail admin."""
+    return [
+        path("reports/search-analytics/", SearchAnalyticsView.as_view(), name="search_analytics"),
+    ]
+
+
+@hooks.register("register_reports_menu_item")
+def register_search_analytics_menu_item():
+    """Add the search analytics report to the Reports menu in Wagtail admin."""
+    return MenuItem(
+        "Search Analytics",
+        reverse("search_analytics"),
+        icon_name="search",
+        order=1010,
+    )